@@ -0,0 +1,145 @@
+"""
+Build time, peak memory and output size of each report type under both PDF engines:
+ReportLab platypus (report_rendering) and PyMuPDF's Story layout (story_rendering).
+
+Sections are shaped like the ones gpt1-gpt5 build. Sizes are shown as rendered and
+after pdf_optimize, which is what render_service actually returns. Peak memory is what
+tracemalloc sees, i.e. Python allocations: MuPDF lays out the Story in C, so its figure
+understates the Story engine's true footprint.
+
+    python benchmarks/engine_benchmark.py [--reports 50] [--rows 10]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import report_rendering  # noqa: E402
+import story_rendering  # noqa: E402
+from pdf_optimize import optimize_pdf  # noqa: E402
+
+ENGINES = {"reportlab": report_rendering.render_pdf, "story": story_rendering.render_pdf}
+SENTENCE = "Shift weekly reviews to the leadership team and keep the CEO on strategic accounts."
+
+
+def bullets(heading, count):
+    return [{"type": "heading", "text": heading}, {"type": "bullets", "items": [f"{SENTENCE} ({i})" for i in range(count)]}, {"type": "spacer"}]
+
+
+def leadership_priorities(rows):
+    return [
+        {"type": "title", "text": "Leadership Priorities Report"},
+        *bullets("Top Strategic Priorities:", 5),
+        {"type": "heading", "text": "Detailed Priority Breakdown:"},
+        {"type": "table", "header": ["Rank", "Priority", "Strategic Goal Alignment", "Action Plan"],
+         "rows": [[str(i), f"Priority {i}", "Increase recurring revenue", SENTENCE] for i in range(1, rows + 1)],
+         "col_widths": [40, 150, 150, 180], "table_style": "centered_first_column"},
+        *bullets("Key Opportunities:", 4),
+        *bullets("Recommended Adjustments:", 4),
+    ]
+
+
+def survey(rows):
+    scores = [[label, [float((i * 7 + offset) % 10 + 1) for i in range(rows)]] for label, offset in (("CEO", 3), ("Team", 5))]
+    return [
+        {"type": "title", "text": "Trust and Delegation Effectiveness Survey Analysis"},
+        {"type": "heading", "text": "Summary of Results", "style": "heading_compact"},
+        {"type": "table", "header": ["Statement", "CEO Score", "Team Score", "Gap", "Significant Gap?", "Observations"],
+         "rows": [[SENTENCE, "7", "5.0", "2.0", "Yes", "Weak perception of clarity."] for _ in range(rows)],
+         "col_widths": [200, 40, 60, 40, 60, 140], "wrap_columns": [0, 5]},
+        {"type": "heading", "text": "Delegation Dynamics Heatmap", "style": "heading_compact"},
+        {"type": "heatmap", "title": "Delegation Dynamics Heatmap", "rows": scores, "width": 400, "height": 200},
+        {"type": "heading", "text": "Trust Dynamics Heatmap", "style": "heading_compact"},
+        {"type": "heatmap", "title": "Trust Dynamics Heatmap", "rows": scores[::-1], "width": 400, "height": 200},
+        *bullets("Summary", 3),
+    ]
+
+
+def trust(rows):
+    return [
+        {"type": "title", "text": "Leadership Trust and Delegation Report"},
+        {"type": "paragraph", "text": "<b>Red-Level Issues:</b>"},
+        *bullets("Critical Areas", 3),
+        {"type": "bullets", "items": [f"<b>Action {i}</b> - Priority: High" for i in range(rows)]},
+        *bullets("Long-Term Strategy", 4),
+    ]
+
+
+def time_liberation(rows):
+    return [
+        {"type": "title", "text": "Time Liberation Matrix Report"},
+        {"type": "heading", "text": "Task Prioritization Matrix:"},
+        {"type": "table", "header": ["Task", "Time Spent", "Urgency", "Impact", "Recommendation"],
+         "rows": [[f"Task {i}: {SENTENCE}" if i % 3 == 0 else f"Task {i}", "10%", "High Urgency", "Low Impact", "Delegate"] for i in range(rows)],
+         "col_widths": [150, 70, 100, 100, 120], "wrap_columns": [0]},
+        *bullets("Recommendations:", 5),
+    ]
+
+
+def profit_and_loss(rows):
+    return [
+        {"type": "title", "text": "Profit and Loss Power Insight Report"},
+        {"type": "heading", "text": "Profit and Loss Metrics Table:"},
+        {"type": "table", "header": ["Year", "Revenue ($M)", "COGS (%)", "Gross Profit ($M)", "Overhead (SG&amp;A %)", "Net Profit ($M)", "Break Even Point ($M)"],
+         "rows": [[str(2015 + i), "$5.00", "40%", "$3.00", "15%", "$2.25", "$5.00"] for i in range(rows)],
+         "col_widths": [60, 80, 60, 100, 80, 80, 80]},
+        *bullets("Observations:", 4),
+        *bullets("Next Steps:", 4),
+    ]
+
+
+def ceo_mandate(rows):
+    return [
+        {"type": "title", "text": "CEO Mandate"},
+        *bullets("Strategic Priorities:", rows),
+        *bullets("Non-Negotiables:", 4),
+        {"type": "heading", "text": "Delegation Focus:"},
+        {"type": "paragraph", "text": "Tasks to Delegate:"},
+        {"type": "bullets", "items": [f"Task {i}" for i in range(rows)]},
+        *bullets("Next Steps:", 5),
+    ]
+
+
+REPORTS = [leadership_priorities, survey, trust, time_liberation, profit_and_loss, ceo_mandate]
+
+
+def measure(render, sections, count):
+    """
+    Return (median ms, peak traced KiB for one build, rendered bytes, optimized bytes).
+    """
+    pdf_bytes = render(sections)  # warm up fonts, styles and the CSS parser
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        render(sections)
+        timings.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    render(sections)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak / 1024, len(pdf_bytes), len(optimize_pdf(pdf_bytes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reports", type=int, default=50, help="Builds per report type and engine")
+    parser.add_argument("--rows", type=int, default=10, help="Table rows / list items per report")
+    args = parser.parse_args()
+
+    print(f"{'report':>22} {'engine':>10} {'median ms':>10} {'peak KiB':>9} {'bytes':>8} {'optimized':>10}")
+    for report in REPORTS:
+        sections = report(args.rows)
+        results = {}
+        for name, render in ENGINES.items():
+            results[name] = measure(render, sections, args.reports)
+            median, peak, size, optimized = results[name]
+            print(f"{report.__name__:>22} {name:>10} {median:>10.2f} {peak:>9.0f} {size:>8} {optimized:>10}")
+        faster = min(results, key=lambda name: results[name][0])
+        print(f"{'':>22} {'faster:':>10} {faster}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Extraction time and prompt size of each files/*.pdf fixture: plain page text vs the
+structured sections of pdf_structure.
+
+"text" is what gpt5.py used to send: {"pages": [{"page_number", "text"}]} from
+get_text(), after prompt_compaction's whitespace, boilerplate and dedupe passes.
+"structured" is document_structure over page_lines. Tokens are estimated the way
+prompt_compaction budgets them, on the JSON the backend actually sends.
+
+    python benchmarks/extraction_benchmark.py [--repeat 50] [files/*.pdf ...]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+import pymupdf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from pdf_structure import document_structure, page_lines  # noqa: E402
+from prompt_compaction import compact_report, estimate_tokens  # noqa: E402
+
+
+def plain_text(pdf_bytes):
+    with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return {"pages": [{"page_number": page.number + 1, "text": page.get_text()} for page in doc]}
+
+
+def structured(pdf_bytes):
+    with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return document_structure(page_lines(page) for page in doc)
+
+
+def median_ms(extract, pdf_bytes, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract(pdf_bytes)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="PDFs to measure (default: files/*.pdf)")
+    parser.add_argument("--repeat", type=int, default=50, help="Extractions per file and method")
+    args = parser.parse_args()
+    paths = args.paths or sorted(glob.glob(os.path.join(ROOT, "files", "*.pdf")))
+
+    print(f"{'file':>36} {'text ms':>8} {'struct ms':>10} {'text tok':>9} {'struct tok':>11} {'saved':>7}")
+    totals = [0, 0]
+    for path in paths:
+        with open(path, "rb") as f:
+            pdf_bytes = f.read()
+        # Silence compact_report's per-report log line
+        with contextlib.redirect_stdout(io.StringIO()):
+            text_tokens = estimate_tokens(json.dumps(compact_report(plain_text(pdf_bytes))[0]))
+        struct_tokens = estimate_tokens(json.dumps(structured(pdf_bytes)))
+        totals[0] += text_tokens
+        totals[1] += struct_tokens
+        print(f"{os.path.basename(path):>36} {median_ms(plain_text, pdf_bytes, args.repeat):>8.2f} "
+              f"{median_ms(structured, pdf_bytes, args.repeat):>10.2f} {text_tokens:>9} {struct_tokens:>11} "
+              f"{1 - struct_tokens / text_tokens:>7.1%}")
+    if totals[0]:
+        print(f"{'total':>36} {'':>8} {'':>10} {totals[0]:>9} {totals[1]:>11} {1 - totals[1] / totals[0]:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
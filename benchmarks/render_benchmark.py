@@ -0,0 +1,120 @@
+"""
+Per-report PDF build time: shared precompiled rendering vs the old ad-hoc pattern.
+
+The ad-hoc variant rebuilds getSampleStyleSheet(), its ParagraphStyles and the
+TableStyle for every report, the way the backends did before report_rendering.
+Both variants render the same leadership-style report into memory.
+
+    python benchmarks/render_benchmark.py [--reports 200] [--rows 20]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_rendering import render_pdf  # noqa: E402
+
+
+def sample_report(rows):
+    return {
+        "priorities": [f"Priority {i}: grow segment {i} revenue by {i * 3}%" for i in range(1, 8)],
+        "table": [
+            [str(i), f"Priority {i}", f"Aligns with goal {i % 4 + 1}", f"Action plan {i} " * 6]
+            for i in range(1, rows + 1)
+        ],
+        "observations": [f"Observation {i} about time allocation and delegation" for i in range(10)],
+    }
+
+
+def adhoc_build(report, output):
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('TitleStyle', parent=styles['Title'], alignment=1)
+    heading_style = styles['Heading2']
+    normal_style = styles['Normal']
+    wrap_style = ParagraphStyle('WrapStyle', parent=normal_style, fontSize=8, leading=10)
+
+    story = [Paragraph("Leadership Priorities Report", title_style), Spacer(1, 12)]
+    story.append(Paragraph("Top Strategic Priorities:", heading_style))
+    for item in report["priorities"]:
+        story.append(Paragraph(f"• {item}", normal_style))
+    story.append(Spacer(1, 12))
+
+    data = [[Paragraph(label, wrap_style) for label in ("Rank", "Priority", "Strategic Goal Alignment", "Action Plan")]]
+    for row in report["table"]:
+        data.append([Paragraph(cell, wrap_style) for cell in row])
+    table = Table(data, colWidths=[40, 180, 180, 180])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#D3D3D3')),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('ALIGN', (0, 1), (0, -1), 'CENTER'),
+    ]))
+    story.append(table)
+    story.append(Spacer(1, 12))
+
+    story.append(Paragraph("Observations:", heading_style))
+    for item in report["observations"]:
+        story.append(Paragraph(f"• {item}", normal_style))
+    doc.build(story)
+
+
+def shared_build(report, output):
+    render_pdf([
+        {"type": "title", "text": "Leadership Priorities Report"},
+        {"type": "heading", "text": "Top Strategic Priorities:"},
+        {"type": "bullets", "items": report["priorities"]},
+        {"type": "spacer"},
+        {
+            "type": "table",
+            "header": ["Rank", "Priority", "Strategic Goal Alignment", "Action Plan"],
+            "rows": report["table"],
+            "col_widths": [40, 180, 180, 180],
+            "table_style": "centered_first_column",
+        },
+        {"type": "spacer"},
+        {"type": "heading", "text": "Observations:"},
+        {"type": "bullets", "items": report["observations"]},
+    ], output)
+
+
+def time_builds(build, report, count):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        build(report, io.BytesIO())
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reports", type=int, default=200, help="Reports built per variant")
+    parser.add_argument("--rows", type=int, default=20, help="Rows in the priority table")
+    args = parser.parse_args()
+
+    report = sample_report(args.rows)
+    # Warm up imports, font metrics and the shared styles before timing
+    adhoc_build(report, io.BytesIO())
+    shared_build(report, io.BytesIO())
+
+    results = {}
+    for name, build in (("ad-hoc styles", adhoc_build), ("shared styles", shared_build)):
+        timings = time_builds(build, report, args.reports)
+        results[name] = statistics.median(timings)
+        print(f"{name:>14}: median {results[name]:.2f} ms, p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:.2f} ms per report")
+    saved = results["ad-hoc styles"] - results["shared styles"]
+    print(f"Shared rendering saves {saved:.2f} ms per report ({saved / results['ad-hoc styles']:.1%}).")
+
+
+if __name__ == "__main__":
+    main()
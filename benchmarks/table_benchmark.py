@@ -0,0 +1,86 @@
+"""
+Render time and peak memory of large survey/task tables: every cell a Paragraph in a
+plain Table (the old approach) vs report_rendering's LongTable path.
+
+    python benchmarks/table_benchmark.py [--rows 100 1000 10000] [--legacy-max-rows 1000]
+
+The old approach is skipped above --legacy-max-rows by default: at 10,000 rows it
+takes minutes (212 s vs 32 s here).
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_rendering import STYLES, table_flowables  # noqa: E402
+
+HEADER = ["Task", "Time Spent", "Urgency", "Impact", "Recommendation"]
+COL_WIDTHS = [150, 70, 100, 100, 120]
+
+
+def sample_rows(count):
+    rows = []
+    for i in range(count):
+        # Every fifth task is long enough to need wrapping
+        task = f"Review the quarterly operating plan with the leadership team, item {i}" if i % 5 == 0 else f"Task {i}"
+        rows.append([task, f"{i % 40}%", "High Urgency", "Medium Impact", "Retain (with efficiency)"])
+    return rows
+
+
+def legacy_table(rows):
+    data = [[Paragraph(label, STYLES["cell"]) for label in HEADER]]
+    data += [[Paragraph(cell, STYLES["cell"]) for cell in row] for row in rows]
+    table = Table(data, colWidths=COL_WIDTHS)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#D3D3D3')),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+    return [table]
+
+
+def scalable_table(rows):
+    return table_flowables(HEADER, rows, COL_WIDTHS, wrap_columns=[0])
+
+
+def measure(make_table, rows):
+    """
+    Build a one-table PDF; return (seconds, peak traced MiB, pages, bytes).
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    doc.build(make_table(rows))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024), doc.page, len(buffer.getvalue())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000], help="Table sizes to render")
+    parser.add_argument("--legacy-max-rows", type=int, default=1000, help="Skip the old approach above this size")
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'variant':>10} {'seconds':>9} {'peak MiB':>9} {'pages':>6} {'KiB':>8}")
+    for count in args.rows:
+        rows = sample_rows(count)
+        variants = [("LongTable", scalable_table)]
+        if count <= args.legacy_max_rows:
+            variants.insert(0, ("Paragraph", legacy_table))
+        for name, make_table in variants:
+            seconds, peak, pages, size = measure(make_table, rows)
+            print(f"{count:>7} {name:>10} {seconds:>9.2f} {peak:>9.1f} {pages:>6} {size / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,12 @@
 import os
 import time
 import streamlit as st
-from openai import OpenAI
+from openai_client import get_client
 
 # --------------------------------------------------------------------------
 # 1. Setup
 # --------------------------------------------------------------------------
-OPENAI_API_KEY = st.secrets['OPENAI_KEY']
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = get_client(secret_name='OPENAI_KEY')
 
 # Temporary directory to store downloaded files
 TEMP_DIR = "temp_files"
@@ -0,0 +1,267 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pymupdf
+
+from pdf_extraction import extraction_service
+from pdf_structure import document_structure
+from prompt_compaction import REPORT_TOKEN_BUDGET, budgeted_pages
+from report_payload import read_embedded_json
+
+# Store location and size, overridable from the environment
+STORE_PATH = os.environ.get("EXTRACTION_STORE_PATH", ".extraction_store.sqlite3")
+STORE_MAX_BYTES = int(os.environ.get("EXTRACTION_STORE_MAX_BYTES", 256 * 1024 * 1024))
+# Bump when extract_page or pdf_structure output changes; other versions' entries are never served
+EXTRACTOR_VERSION = f"1/pymupdf-{pymupdf.VersionBind}"
+# Layout lines (pdf_structure.page_lines) are stored as rows of these fields, not dicts
+LINE_FIELDS = ("text", "size", "bold", "ends_bold", "x0", "y0")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    digest TEXT NOT NULL,
+    version TEXT NOT NULL,
+    page_count INTEGER NOT NULL,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (digest, version)
+);
+CREATE INDEX IF NOT EXISTS documents_last_used ON documents (last_used);
+CREATE TABLE IF NOT EXISTS pages (
+    digest TEXT NOT NULL,
+    version TEXT NOT NULL,
+    page_number INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    lines TEXT NOT NULL,
+    PRIMARY KEY (digest, version, page_number)
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    digest TEXT NOT NULL,
+    version TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    content TEXT NOT NULL,
+    PRIMARY KEY (digest, version, variant)
+);
+"""
+
+
+class ExtractionStore:
+    """
+    Content-addressed SQLite store of extracted PDFs, shared by every session and
+    process on the host and kept across restarts.
+
+    Documents are keyed on the SHA-256 of their bytes plus the extractor version. For
+    each one the store keeps the extract_page output of every page read so far (text
+    and layout lines) and the finished output per variant (e.g. per token budget).
+    Each document's stored size and last use are tracked, so eviction drops the least
+    recently used documents until the store fits in max_bytes. Store errors are
+    logged and treated as misses; extraction never depends on the store.
+    """
+
+    def __init__(self, path=STORE_PATH, max_bytes=STORE_MAX_BYTES, version=EXTRACTOR_VERSION):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Called with self._lock held; one connection is shared by this process's threads
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            # WAL lets other processes (a batch run, another server) read while one writes
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def _touch(self, connection, digest):
+        connection.execute("UPDATE documents SET last_used = ? WHERE digest = ? AND version = ?",
+                           (time.time(), digest, self.version))
+
+    def get_output(self, digest, variant):
+        """
+        Return the output stored for a document and variant, or None on a miss.
+        """
+        try:
+            with self._lock:
+                connection = self._connect()
+                with connection:
+                    row = connection.execute(
+                        "SELECT content FROM outputs WHERE digest = ? AND version = ? AND variant = ?",
+                        (digest, self.version, variant),
+                    ).fetchone()
+                    if row is not None:
+                        self._touch(connection, digest)
+                if row is None:
+                    self.misses += 1
+                    return None
+                self.hits += 1
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error reading extraction store entry {digest}: {e}")
+            return None
+
+    def get_pages(self, digest):
+        """
+        Return the stored pages of a document from page 1 on, as extract_page returns
+        them, stopping at the first page not stored.
+        """
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT page_number, text, lines FROM pages WHERE digest = ? AND version = ? ORDER BY page_number",
+                    (digest, self.version),
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Error reading extraction store pages {digest}: {e}")
+            return []
+        pages = []
+        for page_number, text, lines in rows:
+            if page_number != len(pages) + 1:
+                break
+            pages.append({"page_number": page_number, "text": text,
+                          "lines": [dict(zip(LINE_FIELDS, line)) for line in json.loads(lines)]})
+        return pages
+
+    def put(self, digest, page_count, variant, output, pages=()):
+        """
+        Store a document's output for variant and any pages not stored yet, then evict
+        old documents if the store is over budget.
+        """
+        try:
+            with self._lock:
+                connection = self._connect()
+                with connection:
+                    connection.execute(
+                        "INSERT OR IGNORE INTO documents (digest, version, page_count, last_used) VALUES (?, ?, ?, ?)",
+                        (digest, self.version, page_count, time.time()),
+                    )
+                    connection.executemany(
+                        "INSERT OR IGNORE INTO pages (digest, version, page_number, text, lines) VALUES (?, ?, ?, ?, ?)",
+                        [(digest, self.version, page["page_number"], page["text"],
+                          json.dumps([[line[field] for field in LINE_FIELDS] for line in page["lines"]], separators=(",", ":")))
+                         for page in pages],
+                    )
+                    connection.execute(
+                        "INSERT OR REPLACE INTO outputs (digest, version, variant, content) VALUES (?, ?, ?, ?)",
+                        (digest, self.version, variant, json.dumps(output, separators=(",", ":"))),
+                    )
+                    connection.execute(
+                        """UPDATE documents SET last_used = ?, bytes =
+                               (SELECT COALESCE(SUM(LENGTH(text) + LENGTH(lines)), 0) FROM pages
+                                WHERE digest = documents.digest AND version = documents.version)
+                             + (SELECT COALESCE(SUM(LENGTH(content)), 0) FROM outputs
+                                WHERE digest = documents.digest AND version = documents.version)
+                           WHERE digest = ? AND version = ?""",
+                        (time.time(), digest, self.version),
+                    )
+                self._evict(connection)
+        except sqlite3.Error as e:
+            print(f"Error writing extraction store entry {digest}: {e}")
+
+    def _evict(self, connection):
+        # Called with self._lock held
+        total = connection.execute("SELECT COALESCE(SUM(bytes), 0) FROM documents").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        documents = connection.execute("SELECT digest, version, bytes FROM documents ORDER BY last_used").fetchall()
+        with connection:
+            for digest, version, size in documents:
+                if total <= self.max_bytes:
+                    break
+                for table in ("pages", "outputs", "documents"):
+                    connection.execute(f"DELETE FROM {table} WHERE digest = ? AND version = ?", (digest, version))
+                total -= size
+                self.evictions += 1
+
+    def stats(self):
+        """
+        Return this process's hit/miss/eviction counters and the store's size.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+            try:
+                documents, size = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM documents").fetchone()
+                stats.update(documents=documents, bytes=size)
+            except sqlite3.Error as e:
+                print(f"Error reading extraction store size: {e}")
+            return stats
+
+
+extraction_store = ExtractionStore()
+
+
+def _stored_then_extracted(stored, pdf_bytes, page_count):
+    yield from stored
+    # PyMuPDF rejects a start page past the end, so a fully stored document is not reopened
+    if len(stored) < page_count:
+        yield from extraction_service.iter_pages(pdf_bytes, start=len(stored), page_count=page_count)
+
+
+def stored_extraction(pdf_bytes, digest=None, token_budget=REPORT_TOKEN_BUDGET, store=None):
+    """
+    Extract an in-memory PDF for the mandate prompt, reusing stored work for identical bytes.
+
+    Returns the report's embedded source JSON if it carries one, otherwise its
+    pdf_structure sections. With a token_budget, pages are read starting with those
+    already in the store, then in growing batches (see ExtractionService.iter_pages)
+    until their text fills the budget; with None every page is extracted at once. Long
+    batches and scanned pages go through the extraction_service pool either way.
+    """
+    store = store or extraction_store
+    digest = digest or hashlib.sha256(pdf_bytes).hexdigest()
+    variant = "full" if token_budget is None else f"budget={token_budget}"
+    output = store.get_output(digest, variant)
+    if output is not None:
+        return output
+
+    with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+        # Reports produced by our own tools carry their source JSON; prefer it to raw text
+        embedded = read_embedded_json(doc)
+        page_count = len(doc)
+    if embedded is not None:
+        store.put(digest, page_count, variant, embedded)
+        return embedded
+
+    stored = store.get_pages(digest)
+    start = time.perf_counter()
+    if token_budget is None and len(stored) == page_count:
+        pages = stored
+    elif token_budget is None:
+        pages, timing = extraction_service.extract_pages(pdf_bytes, page_count)
+        print(f"Extracted {timing['pages']} pages in {timing['seconds']:.2f}s ({timing['ranges']} ranges, {timing['workers']} workers, "
+              f"{timing['ocr_pages']} OCR pages, {timing['ocr_cached']} cached, {timing['ocr_seconds']:.2f}s OCR)")
+    else:
+        # The rest of the document would be cut by the budget anyway
+        pages = list(budgeted_pages(_stored_then_extracted(stored, pdf_bytes, page_count), token_budget))
+        print(f"Extracted {len(pages)} of {page_count} pages in {time.perf_counter() - start:.2f}s "
+              f"({min(len(stored), len(pages))} from the store, {token_budget}-token budget)")
+
+    # Rebuild headings, bullet lists and table rows rather than sending flattened page text
+    output = document_structure(page["lines"] for page in pages)
+    store.put(digest, page_count, variant, output, pages[len(stored):])
+    return output
+
+
+if __name__ == "__main__":
+    # python extraction_store.py [report.pdf ...]: extract files into the store (e.g. the
+    # bundled files/ defaults before a deploy), then print the store's counters
+    for path in sys.argv[1:]:
+        with open(path, "rb") as f:
+            stored_extraction(f.read())
+    print(extraction_store.stats())
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Laid-out report fragments kept per process
+FRAGMENT_CACHE_ENTRIES = int(os.environ.get("FRAGMENT_CACHE_ENTRIES", 256))
+
+
+class FragmentCache:
+    """
+    In-memory LRU cache of pre-built report fragments.
+
+    Entries are keyed on the SHA-256 of the canonical JSON of the section that
+    produced them, so a deterministic section (a table built from survey scores or
+    P&L metrics) is laid out once and reused for as long as its inputs are unchanged.
+    What is stored is up to the caller; report_rendering keeps table cells and their
+    measured row heights.
+    """
+
+    def __init__(self, max_entries=FRAGMENT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(section):
+        canonical = json.dumps(section, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, section, default=None):
+        """
+        Return the fragment cached for section, or default on a miss.
+        """
+        key = self.make_key(section)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, section, fragment):
+        key = self.make_key(section)
+        with self._lock:
+            self._entries[key] = fragment
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_build(self, section, build):
+        """
+        Return the fragment cached for section, calling build() to create it on a miss.
+        """
+        missing = object()
+        fragment = self.get(section, missing)
+        if fragment is missing:
+            fragment = build()
+            self.put(section, fragment)
+        return fragment
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Return hit/miss counters and the entry count for this process.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+fragment_cache = FragmentCache()
@@ -1,234 +1,16 @@
 import streamlit as st
-from openai import OpenAI 
+from openai_client import get_client
 import os
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import Table, TableStyle
-from reportlab.lib import colors
-import tempfile
 import json
+from llm_cache import cached_completion, stream_completion
+from json_stream import TopLevelObjectParser
+from render_service import render_service
+from json_repair import invalid_sections, loads_lenient, regenerate_sections
+from report_output import lazy_pdf, show_report
 # Set up OpenAI API 
-api_key = st.secrets["OPENAI_API_KEY"]
-client = OpenAI(api_key=api_key)
-def create_priority_table(input_data, report_data):
-    """
-    Create a priority table using the 'detailed_priority_breakdown' section of report_data.
-    This function ignores the old method of deriving data from 'top_strategic_priorities', 
-    'business_goals', and 'key_oppertunities', and instead uses the structured JSON provided 
-    in 'detailed_priority_breakdown'.
-
-    Handles missing data gracefully by using "N/A".
-    Uses Paragraph with a wrap style for better text fitting.
-    """
-
-    styles = getSampleStyleSheet()
-    wrap_style = styles['Normal']
-    wrap_style.fontSize = 8  # Reduce font size for better fit
-    wrap_style.leading = 10  # Adjust line spacing
-
-    # Retrieve detailed priority breakdown data
-    breakdown_data = report_data.get("detailed_priority_breakdown", [])
-
-    # Prepare table header with Paragraphs for wrapping
-    table_data = [[
-        Paragraph("Rank", wrap_style),
-        Paragraph("Priority", wrap_style),
-        Paragraph("Strategic Goal Alignment", wrap_style),
-        Paragraph("Action Plan", wrap_style)
-    ]]
-
-    # Iterate through each breakdown entry
-    for entry in breakdown_data:
-        rank = str(entry.get("rank", "N/A"))
-        priority = entry.get("priority", "N/A")
-        alignment = entry.get("strategic_goal_alignment", "N/A")
-        action_plan = entry.get("action_plan", "N/A")
-
-        # Wrap text in Paragraphs
-        rank_paragraph = Paragraph(rank, wrap_style)
-        priority_paragraph = Paragraph(priority, wrap_style)
-        alignment_paragraph = Paragraph(alignment, wrap_style)
-        action_plan_paragraph = Paragraph(action_plan, wrap_style)
-
-        table_data.append([
-            rank_paragraph,
-            priority_paragraph,
-            alignment_paragraph,
-            action_plan_paragraph
-        ])
-
-    # Create the table with adjusted widths if needed
-    table = Table(table_data, colWidths=[40, 180, 180, 180])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#D3D3D3')),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('ALIGN', (0, 1), (0, -1), 'CENTER'),
-    ]))
-
-    return table
-
-
-def create_pdf(report_data, input_data):
-    """
-    Create a PDF from the GPT-generated JSON report
-    """
-    # Create a temporary file
-    temp_pdf = tempfile.mktemp(".pdf")
-    
-    # Create PDF document
-    doc = SimpleDocTemplate(temp_pdf, pagesize=letter)
-    
-    # Get styles
-    styles = getSampleStyleSheet()
-    title_style = styles['Title']
-    heading_style = styles['Heading2']
-    normal_style = styles['Normal']
-    
-    # Build story (content)
-    story = []
-    
-    # Title
-    story.append(Paragraph("Leadership Priorities Report", title_style))
-    story.append(Spacer(1, 12))
-    
-    try:
-        # Top Strategic Priorities
-        story.append(Paragraph("Top Strategic Priorities:", heading_style))
-        for priority in report_data.get('top_strategic_priorities', []):
-            story.append(Paragraph(f"• {priority.get('priority', 'N/A')}: {priority.get('rationale', 'N/A')}", normal_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
-    
-    try:
-        # Insert the priority table
-        priority_table = create_priority_table(input_data, report_data)
-        story.append(Spacer(1, 12))
-        story.append(Paragraph("Detailed Priority Breakdown:", heading_style))
-        story.append(Spacer(1, 12))
-        story.append(priority_table)
-        story.append(Spacer(1, 12))
-    except:
-        pass
-    try:
-        # key oppertunities
-        story.append(Paragraph("Key Opportunities:", heading_style))
-        for item in report_data.get('key_oppertunities', []):
-            story.append(Paragraph(f"• {item}", normal_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
-
-    try:
-        # Non-Negotiables
-        story.append(Paragraph("Non-Negotiables:", heading_style))
-        for item in report_data.get('non_negotiables', []):
-            story.append(Paragraph(f"• {item}", normal_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
-    
-    try:
-        # Observations
-        story.append(Paragraph("Observations:", heading_style))
-        observations = report_data.get('observations', {})
-        story.append(Spacer(1, 12))
-    except:
-        pass
-    
-    try:
-        # Time Allocation Misalignment
-        story.append(Paragraph("Time Allocation Misalignment:", heading_style))
-        story.append(Paragraph(observations.get('time_allocation_misalignment', 'No specific misalignment noted.'), normal_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
-    
-    try:
-        # Recommended Adjustments
-        story.append(Paragraph("Recommended Adjustments:", heading_style))
-        for adjustment in observations.get('recommended_adjustments', []):
-            story.append(Paragraph(f"• {adjustment}", normal_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
-    
-    try:
-        story.append(Paragraph("Next Steps:", heading_style))
-        for adjustment in observations.get('next_steps', []):
-            story.append(Paragraph(f"• {adjustment}", normal_style))
-    except:
-        pass
-    
-    # Build PDF
-    doc.build(story)
-    
-    return temp_pdf
+client = get_client()
 
-def create_pdf_old(report_data):
-    """
-    Create a PDF from the GPT-generated JSON report
-    """
-    # Create a temporary file
-    temp_pdf = tempfile.mktemp(".pdf")
-    
-    # Create PDF document
-    doc = SimpleDocTemplate(temp_pdf, pagesize=letter)
-    
-    # Get styles
-    styles = getSampleStyleSheet()
-    title_style = styles['Title']
-    heading_style = styles['Heading2']
-    normal_style = styles['Normal']
-    
-    # Build story (content)
-    story = []
-    
-    # Title
-    story.append(Paragraph("Leadership Priorities Report", title_style))
-    story.append(Spacer(1, 12))
-    
-    # Top Strategic Priorities
-    story.append(Paragraph("Top Strategic Priorities:", heading_style))
-    for priority in report_data.get('top_strategic_priorities', []):
-        story.append(Paragraph(f"• {priority['priority']}: {priority['rationale']}", normal_style))
-    story.append(Spacer(1, 12))
-    
-    # Non-Negotiables
-    story.append(Paragraph("Non-Negotiables:", heading_style))
-    for item in report_data.get('non_negotiables', []):
-        story.append(Paragraph(f"• {item}", normal_style))
-    story.append(Spacer(1, 12))
-    
-    # Observations
-    story.append(Paragraph("Observations:", heading_style))
-    observations = report_data.get('observations', {})
-    
-    # Time Allocation Misalignment
-    story.append(Paragraph("Time Allocation Misalignment:", heading_style))
-    story.append(Paragraph(observations.get('time_allocation_misalignment', 'No specific misalignment noted.'), normal_style))
-    story.append(Spacer(1, 12))
-    
-    # Recommended Adjustments
-    story.append(Paragraph("Recommended Adjustments:", heading_style))
-    for adjustment in observations.get('recommended_adjustments', []):
-        story.append(Paragraph(f"• {adjustment}", normal_style))
-    
-    story.append(Paragraph("Next Steps:", heading_style))
-    for adjustment in observations.get('next_steps', []):
-        story.append(Paragraph(f"• {adjustment}", normal_style))
-    
-    # Build PDF
-    doc.build(story)
-    
-    return temp_pdf
-
-
-def generate_leadership_report(input_data):
-    system_prompt = """
+LEADERSHIP_SYSTEM_PROMPT = """
     You are a strategic leadership advisor.  
     Using the CEO’s 'job_description', 'business_goals', current 'focus_areas', and 'time_percentage', analyze and rank the top 7 strategic priorities based on alignment with business objectives and potential impact. Incorporate insights from the P&L Power Insight GPT and provide actionable recommendations for realignment."
 
@@ -315,20 +97,330 @@ def generate_leadership_report(input_data):
     PS: STRICTLY adhere to the output format
     PS: Your response should be HIGHLY correlated and dependent on input. Dont make any numbers up.
     """
+
+# Expected shape of the leadership report, used to repair GPT output before rendering
+LEADERSHIP_SCHEMA = {
+    "top_strategic_priorities": list,
+    "key_oppertunities": list,
+    "non_negotiables": list,
+    "observations": {
+        "time_allocation_misalignment": str,
+        "recommended_adjustments": list,
+        "next_steps": list,
+    },
+    "detailed_priority_breakdown": list,
+}
+
+# Spellings the model uses for keys in place of the ones the report expects
+KEY_ALIASES = {
+    "key_opportunities": "key_oppertunities",
+    "strategic_priorities": "top_strategic_priorities",
+    "priority_breakdown": "detailed_priority_breakdown",
+}
+
+RECORD_FIELDS = {"rank", "priority", "rationale", "strategic_goal_alignment", "action_plan"}
+
+# Filled in by repair_leadership_report when GPT gives no misalignment
+NO_MISALIGNMENT = "No specific misalignment noted."
+
+def _as_text(value):
+    """
+    Flatten any JSON value into display text.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return "; ".join(_as_text(v) for v in value.values() if _as_text(v))
+    if isinstance(value, list):
+        return "; ".join(_as_text(v) for v in value if _as_text(v))
+    return str(value)
+
+def _as_text_list(value):
+    """
+    Normalize a string, a list or a {label: text} dict into a list of non-empty strings.
+    """
+    if isinstance(value, dict):
+        value = list(value.values())
+    elif not isinstance(value, list):
+        value = [value]
+    return [text for text in (_as_text(item) for item in value) if text]
+
+def _as_records(value):
+    """
+    Normalize a list, a single record or a {label: record} dict into a list of dicts.
+    """
+    if isinstance(value, dict):
+        # One record, or records keyed by a label such as "Priority 1"
+        if value and all(isinstance(v, (dict, str)) for v in value.values()) and not RECORD_FIELDS & set(value):
+            value = list(value.values())
+        else:
+            value = [value]
+    elif not isinstance(value, list):
+        value = [value] if value else []
+    records = []
+    for item in value:
+        if isinstance(item, dict):
+            records.append(item)
+        elif _as_text(item):
+            records.append({"priority": _as_text(item)})
+    return records
+
+def _coerce_rank(value, default):
+    """
+    Read a rank from 1, 1.0, "1", "#1" or "Rank 1"; fall back to default.
+    """
+    if isinstance(value, bool):
+        return default
+    if isinstance(value, (int, float)):
+        return int(value)
+    digits = "".join(ch if ch.isdigit() else " " for ch in _as_text(value)).split()
+    return int(digits[0]) if digits else default
+
+def repair_leadership_report(report_data):
+    """
+    Coerce a leadership report into the shape create_pdf expects, without calling GPT.
+
+    Accepts the raw JSON text or an already parsed dict. Fixes aliased keys, lists
+    given as strings or dicts, missing record fields and ranks given as text.
+    Returns (report, unrepairable) where unrepairable lists the sections that are
+    missing or empty and can only be regenerated.
+    """
+    data = loads_lenient(report_data) or {}
+    for alias, key in KEY_ALIASES.items():
+        if alias in data and not data.get(key):
+            data[key] = data.pop(alias)
+
+    observations = data.get("observations")
+    if not isinstance(observations, dict):
+        observations = {"time_allocation_misalignment": observations} if _as_text(observations) else {}
+    # Observation fields the model sometimes lifts to the top level
+    for key in LEADERSHIP_SCHEMA["observations"]:
+        if key in data and not observations.get(key):
+            observations[key] = data.pop(key)
+
+    report = {
+        "top_strategic_priorities": [
+            {
+                "priority": _as_text(record.get("priority")) or "N/A",
+                "rationale": _as_text(record.get("rationale")) or "N/A",
+            }
+            for record in _as_records(data.get("top_strategic_priorities"))
+        ],
+        "key_oppertunities": _as_text_list(data.get("key_oppertunities")),
+        "non_negotiables": _as_text_list(data.get("non_negotiables")),
+        "observations": {
+            "time_allocation_misalignment": _as_text(observations.get("time_allocation_misalignment")) or NO_MISALIGNMENT,
+            "recommended_adjustments": _as_text_list(observations.get("recommended_adjustments")),
+            "next_steps": _as_text_list(observations.get("next_steps")),
+        },
+        "detailed_priority_breakdown": sorted(
+            (
+                {
+                    "rank": _coerce_rank(record.get("rank"), position),
+                    "priority": _as_text(record.get("priority")) or "N/A",
+                    "strategic_goal_alignment": _as_text(record.get("strategic_goal_alignment")) or "N/A",
+                    "action_plan": _as_text(record.get("action_plan")) or "N/A",
+                }
+                for position, record in enumerate(_as_records(data.get("detailed_priority_breakdown")), 1)
+            ),
+            key=lambda record: record["rank"],
+        ),
+    }
+    return report, invalid_sections(report, LEADERSHIP_SCHEMA)
+
+def complete_leadership_report(report_data, input_data):
+    """
+    Repair a report locally and regenerate only the sections that cannot be repaired.
+    """
+    report, missing = repair_leadership_report(report_data)
+    if missing:
+        st.info(f"Regenerating missing sections: {', '.join(missing)}")
+        regenerated = regenerate_sections(client, LEADERSHIP_SYSTEM_PROMPT, input_data, missing, LEADERSHIP_SCHEMA)
+        for section, value in regenerated.items():
+            if isinstance(value, dict) and isinstance(report.get(section), dict):
+                # Keep the fields of a nested section that were already filled in, but not repair's placeholders
+                value = dict(value, **{key: item for key, item in report[section].items() if item and item != NO_MISALIGNMENT})
+            report[section] = value
+        report, missing = repair_leadership_report(report)
+    return report, missing
+
+def priority_table_section(report_data):
+    """
+    Build the priority table section from the 'detailed_priority_breakdown' of report_data.
+    This ignores the old method of deriving data from 'top_strategic_priorities',
+    'business_goals', and 'key_oppertunities', and instead uses the structured JSON provided
+    in 'detailed_priority_breakdown'.
+
+    Handles missing data gracefully by using "N/A".
+    """
+    rows = [
+        [
+            str(entry.get("rank", "N/A")),
+            entry.get("priority", "N/A"),
+            entry.get("strategic_goal_alignment", "N/A"),
+            entry.get("action_plan", "N/A"),
+        ]
+        for entry in report_data.get("detailed_priority_breakdown", [])
+    ]
+    return {
+        "type": "table",
+        "header": ["Rank", "Priority", "Strategic Goal Alignment", "Action Plan"],
+        "rows": rows,
+        "col_widths": [40, 180, 180, 180],
+        "table_style": "centered_first_column",
+    }
+
+
+def leadership_report(report_data, input_data):
+    """
+    Build the report dict (sections plus embedded JSON) for the GPT-generated report
+    """
+    sections = [{"type": "title", "text": "Leadership Priorities Report"}]
+
+    try:
+        # Top Strategic Priorities
+        sections += [
+            {"type": "heading", "text": "Top Strategic Priorities:"},
+            {"type": "bullets", "items": [f"{priority.get('priority', 'N/A')}: {priority.get('rationale', 'N/A')}" for priority in report_data.get('top_strategic_priorities', [])]},
+            {"type": "spacer"},
+        ]
+    except:
+        pass
+
     try:
-        response = client.chat.completions.create(
+        # Insert the priority table
+        sections += [
+            {"type": "spacer"},
+            {"type": "heading", "text": "Detailed Priority Breakdown:"},
+            {"type": "spacer"},
+            priority_table_section(report_data),
+            {"type": "spacer"},
+        ]
+    except:
+        pass
+
+    sections += [
+        # key oppertunities
+        {"type": "heading", "text": "Key Opportunities:"},
+        {"type": "bullets", "items": report_data.get('key_oppertunities', [])},
+        {"type": "spacer"},
+        # Non-Negotiables
+        {"type": "heading", "text": "Non-Negotiables:"},
+        {"type": "bullets", "items": report_data.get('non_negotiables', [])},
+        {"type": "spacer"},
+    ]
+
+    try:
+        # Observations
+        observations = report_data.get('observations', {})
+        sections += [
+            {"type": "heading", "text": "Observations:"},
+            {"type": "spacer"},
+            # Time Allocation Misalignment
+            {"type": "heading", "text": "Time Allocation Misalignment:"},
+            {"type": "paragraph", "text": observations.get('time_allocation_misalignment', 'No specific misalignment noted.')},
+            {"type": "spacer"},
+            # Recommended Adjustments
+            {"type": "heading", "text": "Recommended Adjustments:"},
+            {"type": "bullets", "items": observations.get('recommended_adjustments', [])},
+            {"type": "spacer"},
+            {"type": "heading", "text": "Next Steps:"},
+            {"type": "bullets", "items": observations.get('next_steps', [])},
+        ]
+    except:
+        pass
+
+    return {
+        "sections": sections,
+        "report_type": "leadership_priorities",
+        "payload": {"input_data": input_data, "report": report_data},
+    }
+
+
+def create_pdf(report_data, input_data):
+    """
+    Create a PDF from the GPT-generated JSON report and return its bytes
+    """
+    return render_service.render_report(leadership_report(report_data, input_data))
+
+
+def generate_leadership_report(input_data):
+    try:
+        return cached_completion(
+            client,
             model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": json.dumps(input_data)}
-            ],
+            system_prompt=LEADERSHIP_SYSTEM_PROMPT,
+            user_payload=input_data,
             response_format={"type": "json_object"}
         )
-        return response.choices[0].message.content
     except Exception as e:
         st.error(f"Error generating report: {e}")
         return None
 
+def stream_leadership_report(input_data):
+    """
+    Stream the leadership report from GPT, yielding (section, value) pairs as soon as
+    each top-level section of the JSON has been generated.
+    """
+    parser = TopLevelObjectParser()
+    for chunk in stream_completion(
+        client,
+        model="gpt-4o-mini",
+        system_prompt=LEADERSHIP_SYSTEM_PROMPT,
+        user_payload=input_data,
+        response_format={"type": "json_object"}
+    ):
+        for section, value in parser.feed(chunk):
+            yield section, value
+
+# Display titles for the report sections, in the order the model emits them
+SECTION_TITLES = {
+    "top_strategic_priorities": "Top Strategic Priorities",
+    "key_oppertunities": "Key Opportunities",
+    "non_negotiables": "Non-Negotiables",
+    "observations": "Observations",
+    "detailed_priority_breakdown": "Detailed Priority Breakdown",
+}
+
+def render_section(section, value):
+    """
+    Render one completed report section in the Streamlit page.
+    """
+    st.subheader(SECTION_TITLES.get(section, section.replace("_", " ").title()))
+    try:
+        if section == "top_strategic_priorities":
+            for priority in value:
+                st.markdown(f"- **{priority.get('priority', 'N/A')}**: {priority.get('rationale', 'N/A')}")
+        elif section == "detailed_priority_breakdown":
+            st.table([
+                {
+                    "Rank": str(entry.get("rank", "N/A")),
+                    "Priority": entry.get("priority", "N/A"),
+                    "Strategic Goal Alignment": entry.get("strategic_goal_alignment", "N/A"),
+                    "Action Plan": entry.get("action_plan", "N/A"),
+                }
+                for entry in value
+            ])
+        elif section == "observations":
+            st.markdown("**Time Allocation Misalignment:** " + value.get("time_allocation_misalignment", "No specific misalignment noted."))
+            st.markdown("**Recommended Adjustments:**")
+            for adjustment in value.get("recommended_adjustments", []):
+                st.markdown(f"- {adjustment}")
+            st.markdown("**Next Steps:**")
+            for step in value.get("next_steps", []):
+                st.markdown(f"- {step}")
+        elif isinstance(value, list):
+            for item in value:
+                st.markdown(f"- {item}")
+        else:
+            st.write(value)
+    except Exception as e:
+        # A malformed streamed value is shown as-is instead of aborting the stream
+        print(f"Error rendering {section} section: {e}")
+        st.write(value)
+
 def main():
     st.title("Strategic Priorities Compass")
     
@@ -389,6 +481,8 @@ def main():
     if total_time != 100:
         st.warning("Total time allocation should sum up to 100%. Please adjust the sliders.")
     
+    stream_report = st.toggle("Show report sections as they are generated", value=True)
+
     # Submit Button
     if st.button("Generate Leadership Priorities Report"):
         # if total_time != 100:
@@ -401,70 +495,44 @@ def main():
             }
             
             # Generate report
-        raw_response = generate_leadership_report(input_data)
+        # Streamed sections are drawn here and replaced by the repaired report once it is complete
+        live_report = st.empty()
+        if stream_report:
+            report_data = {}
+            try:
+                with live_report.container():
+                    for section, value in stream_leadership_report(input_data):
+                        report_data[section] = value
+                        render_section(section, value)
+            except Exception as e:
+                st.error(f"Error generating report: {e}")
+            raw_response = json.dumps(report_data, indent=2) if report_data else None
+        else:
+            raw_response = generate_leadership_report(input_data)
             
         if raw_response:
                 # Display raw GPT response
             st.text_area("Raw GPT Response", raw_response, height=200)
-                
-                # Try to create PDF
+
+            # Repair the JSON locally; GPT is only asked again for sections that are missing
+            report_data, missing = complete_leadership_report(raw_response, input_data)
+            if missing:
+                st.warning(f"Some sections could not be generated: {', '.join(missing)}")
             try:
-                pdf_path = create_pdf(json.loads(raw_response), input_data)
-                # pdf_path = create_pdf(json.loads(raw_response))
-                with open(pdf_path, "rb") as pdf_file:
-                    st.download_button(
-                        label="Download Report PDF",
-                        data=pdf_file,
-                        file_name="leadership_priorities_report.pdf",
-                        mime="application/pdf"
-                    )
+                report = leadership_report(report_data, input_data)
+                # Shown instantly; the PDF is only rendered if it is downloaded
+                live_report.empty()
+                with live_report.container():
+                    show_report(report)
+                st.download_button(
+                    label="Download Report PDF",
+                    data=lazy_pdf(report),
+                    file_name="leadership_priorities_report.pdf",
+                    mime="application/pdf",
+                    on_click="ignore"
+                )
             except Exception as e:
-                st.warning(f"PDF generation failed. Attempting to regenerate JSON: {e}")
-                
-                # Attempt to regenerate JSON
-                try:
-                    st.info("Sending the response back to GPT for regeneration...")
-                    regenerated_response = generate_leadership_report(json.loads(raw_response))
-                    if regenerated_response:
-                        st.text_area("Regenerated GPT Response", regenerated_response, height=200)
-                        # Attempt PDF creation again
-                        try:
-                            pdf_path = create_pdf(json.loads(regenerated_response))
-                            with open(pdf_path, "rb") as pdf_file:
-                                st.download_button(
-                                    label="Download Report PDF (Regenerated)",
-                                    data=pdf_file,
-                                    file_name="leadership_priorities_report.pdf",
-                                    mime="application/pdf"
-                                )
-                        except Exception as e:
-                            st.warning(f"Second PDF generation failed. Saving as text: {e}")
-                            # Fallback to text file
-                            txt_path = "leadership_priorities_report.txt"
-                            with open(txt_path, "w") as txt_file:
-                                txt_file.write(regenerated_response)
-                            with open(txt_path, "rb") as txt_file:
-                                st.download_button(
-                                    label="Download Report TXT",
-                                    data=txt_file,
-                                    file_name="leadership_priorities_report.txt",
-                                    mime="text/plain"
-                                )
-                    else:
-                        st.error("Failed to regenerate response from GPT.")
-                except Exception as e:
-                    st.error(f"Regeneration attempt failed: {e}")
-                    # Final fallback to text file
-                    txt_path = "leadership_priorities_report.txt"
-                    with open(txt_path, "w") as txt_file:
-                        txt_file.write(raw_response)
-                    with open(txt_path, "rb") as txt_file:
-                        st.download_button(
-                            label="Download Report TXT",
-                            data=txt_file,
-                            file_name="leadership_priorities_report.txt",
-                            mime="text/plain"
-                        )
+                st.error(f"Error generating report: {e}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
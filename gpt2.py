@@ -1,8 +1,7 @@
 import streamlit as st
 import json, os
 from gpt2_backend import generate_leadership_report  # Importing the function as requested
-import io
-import zipfile
+from report_output import lazy_zip, show_report
 # Function to create survey UI
 def survey_ui(title, questions, prefill_scores, tab):
     with tab:
@@ -89,19 +88,23 @@ def main():
 
         # Call the generate_leadership_report function
         try:
-            pdf_path1, pdf_path2 = generate_leadership_report(survey_data)
-            zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(zip_buffer, "w") as zf:
-                zf.write(pdf_path1, arcname="Survey_Report.pdf")
-                zf.write(pdf_path2, arcname="Trust_Report.pdf")
-            zip_buffer.seek(0)
+            timings = {}
+            # Reports are shown straight away; the PDFs are rendered only when downloaded
+            survey_report, trust_report = generate_leadership_report(survey_data, timings=timings, render=False)
+            st.caption(" | ".join(f"{stage}: {seconds:.1f}s" for stage, seconds in timings.items()))
+            survey_tab, trust_tab = st.tabs(["Survey Report", "Trust Report"])
+            with survey_tab:
+                show_report(survey_report)
+            with trust_tab:
+                show_report(trust_report)
 
             # Provide download button for the ZIP file
             st.download_button(
                 label="Download Reports (ZIP)",
-                data=zip_buffer,
+                data=lazy_zip({"Survey_Report.pdf": survey_report, "Trust_Report.pdf": trust_report}),
                 file_name="Reports.zip",
-                mime="application/zip"
+                mime="application/zip",
+                on_click="ignore"
             )
             
         except Exception as e:
@@ -1,142 +1,17 @@
 import streamlit as st
 import os
 import json
-import tempfile
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import matplotlib.pyplot as plt
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import (
-    SimpleDocTemplate,
-    Paragraph,
-    Spacer,
-    Table,
-    TableStyle,
-    Image as ReportLabImage,
-    PageBreak,
-)
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-from openai import OpenAI 
-api_key = st.secrets["OPENAI_API_KEY"]
-client = OpenAI(api_key=api_key)
+from openai_client import get_client
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from llm_cache import cached_completion
+from render_service import render_service
+client = get_client()
 
-
-def calculate_metrics(input_data):
-    """
-    Calculate detailed metrics from the input JSON data.
-    """
-    metrics = {}
-    try:
-        # Extract CEO scores
-        ceo_delegation_scores = []
-        ceo_trust_scores = []
-        try:
-            for key in input_data['CEO Input']['Delegation Dynamics']:
-                try:
-                    score = input_data['CEO Input']['Delegation Dynamics'][key]['score']
-                    ceo_delegation_scores.append(score)
-                except Exception as e:
-                    print(f"Error extracting CEO Delegation Dynamics score for key {key}: {e}")
-            ceo_delegation_avg = np.mean(ceo_delegation_scores)
-        except Exception as e:
-            print(f"Error calculating ceo_delegation_avg: {e}")
-            ceo_delegation_avg = 'N/A'
-
-        try:
-            for key in input_data['CEO Input']['Trust Dynamics']:
-                try:
-                    score = input_data['CEO Input']['Trust Dynamics'][key]['score']
-                    ceo_trust_scores.append(score)
-                except Exception as e:
-                    print(f"Error extracting CEO Trust Dynamics score for key {key}: {e}")
-            ceo_trust_avg = np.mean(ceo_trust_scores)
-        except Exception as e:
-            print(f"Error calculating ceo_trust_avg: {e}")
-            ceo_trust_avg = 'N/A'
-
-        # Extract Team scores
-        team_delegation_scores = []
-        team_trust_scores = []
-        try:
-            for key in input_data['Leadership Team']['Delegation Dynamics']:
-                try:
-                    score = input_data['Leadership Team']['Delegation Dynamics'][key]['score']
-                    team_delegation_scores.append(score)
-                except Exception as e:
-                    print(f"Error extracting Team Delegation Dynamics score for key {key}: {e}")
-            team_delegation_avg = np.mean(team_delegation_scores)
-        except Exception as e:
-            print(f"Error calculating team_delegation_avg: {e}")
-            team_delegation_avg = 'N/A'
-
-        try:
-            for key in input_data['Leadership Team']['Trust Dynamics']:
-                try:
-                    score = input_data['Leadership Team']['Trust Dynamics'][key]['score']
-                    team_trust_scores.append(score)
-                except Exception as e:
-                    print(f"Error extracting Team Trust Dynamics score for key {key}: {e}")
-            team_trust_avg = np.mean(team_trust_scores)
-        except Exception as e:
-            print(f"Error calculating team_trust_avg: {e}")
-            team_trust_avg = 'N/A'
-
-        # Calculate Gaps
-        try:
-            if isinstance(ceo_delegation_avg, (int, float)) and isinstance(team_delegation_avg, (int, float)):
-                delegation_gap = ceo_delegation_avg - team_delegation_avg
-            else:
-                delegation_gap = 'N/A'
-        except Exception as e:
-            print(f"Error calculating delegation_gap: {e}")
-            delegation_gap = 'N/A'
-
-        try:
-            if isinstance(ceo_trust_avg, (int, float)) and isinstance(team_trust_avg, (int, float)):
-                trust_gap = ceo_trust_avg - team_trust_avg
-            else:
-                trust_gap = 'N/A'
-        except Exception as e:
-            print(f"Error calculating trust_gap: {e}")
-            trust_gap = 'N/A'
-
-        metrics = {
-            'ceo_delegation_scores': ceo_delegation_scores,
-            'ceo_trust_scores': ceo_trust_scores,
-            'team_delegation_scores': team_delegation_scores,
-            'team_trust_scores': team_trust_scores,
-            'ceo_delegation_avg': ceo_delegation_avg,
-            'ceo_trust_avg': ceo_trust_avg,
-            'team_delegation_avg': team_delegation_avg,
-            'team_trust_avg': team_trust_avg,
-            'delegation_gap': delegation_gap,
-            'trust_gap': trust_gap
-        }
-    except Exception as e:
-        print(f"Error in calculate_metrics: {e}")
-        metrics = {
-            'ceo_delegation_scores': [],
-            'ceo_trust_scores': [],
-            'team_delegation_scores': [],
-            'team_trust_scores': [],
-            'ceo_delegation_avg': 'N/A',
-            'ceo_trust_avg': 'N/A',
-            'team_delegation_avg': 'N/A',
-            'team_trust_avg': 'N/A',
-            'delegation_gap': 'N/A',
-            'trust_gap': 'N/A'
-        }
-
-    return metrics
-
-def generate_gpt_analysis(input_data, metrics, summary_data):
-    """
-    Generate comprehensive analysis using GPT.
-    """
-    # Prepare system prompt with detailed context
-    
-    system_prompt = """
+SURVEY_ANALYSIS_PROMPT = """
 You are an expert organizational consultant. Analyze the results of two surveys on Trust and Delegation Effectiveness conducted with the CEO and the leadership team. Your analysis should include the following:
 
 ## **summary_of_results**
@@ -207,21 +82,7 @@ Output a JSON in the following strict format:
 
 """
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": json.dumps({"input_data": input_data, "metrics": metrics, "summary_data": summary_data})}
-            ],
-            response_format={"type": "json_object"}
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        st.error(f"Error generating report: {e}")
-        return None
-def generate_gpt_analysis2(input_data, metrics, summary_data):
-        system_prompt = """
+TRUST_ANALYSIS_PROMPT = """
             You are an expert leadership consultant. Analyze the survey results for Trust and Delegation Effectiveness conducted with the CEO and the leadership team. Provide a detailed report that includes:
 
             ## **Strategic Priorities**
@@ -309,383 +170,360 @@ def generate_gpt_analysis2(input_data, metrics, summary_data):
             - Always include all keys in the JSON structure.
             - Explicitly mention "No data available" for sections with missing data.
             """
+
+
+def calculate_metrics(input_data):
+    """
+    Calculate detailed metrics from the input JSON data.
+    """
+    metrics = {}
+    try:
+        # Extract CEO scores
+        ceo_delegation_scores = []
+        ceo_trust_scores = []
+        try:
+            for key in input_data['CEO Input']['Delegation Dynamics']:
+                try:
+                    score = input_data['CEO Input']['Delegation Dynamics'][key]['score']
+                    ceo_delegation_scores.append(score)
+                except Exception as e:
+                    print(f"Error extracting CEO Delegation Dynamics score for key {key}: {e}")
+            ceo_delegation_avg = np.mean(ceo_delegation_scores)
+        except Exception as e:
+            print(f"Error calculating ceo_delegation_avg: {e}")
+            ceo_delegation_avg = 'N/A'
+
+        try:
+            for key in input_data['CEO Input']['Trust Dynamics']:
+                try:
+                    score = input_data['CEO Input']['Trust Dynamics'][key]['score']
+                    ceo_trust_scores.append(score)
+                except Exception as e:
+                    print(f"Error extracting CEO Trust Dynamics score for key {key}: {e}")
+            ceo_trust_avg = np.mean(ceo_trust_scores)
+        except Exception as e:
+            print(f"Error calculating ceo_trust_avg: {e}")
+            ceo_trust_avg = 'N/A'
+
+        # Extract Team scores
+        team_delegation_scores = []
+        team_trust_scores = []
+        try:
+            for key in input_data['Leadership Team']['Delegation Dynamics']:
+                try:
+                    score = input_data['Leadership Team']['Delegation Dynamics'][key]['score']
+                    team_delegation_scores.append(score)
+                except Exception as e:
+                    print(f"Error extracting Team Delegation Dynamics score for key {key}: {e}")
+            team_delegation_avg = np.mean(team_delegation_scores)
+        except Exception as e:
+            print(f"Error calculating team_delegation_avg: {e}")
+            team_delegation_avg = 'N/A'
+
         try:
-            response = client.chat.completions.create(
+            for key in input_data['Leadership Team']['Trust Dynamics']:
+                try:
+                    score = input_data['Leadership Team']['Trust Dynamics'][key]['score']
+                    team_trust_scores.append(score)
+                except Exception as e:
+                    print(f"Error extracting Team Trust Dynamics score for key {key}: {e}")
+            team_trust_avg = np.mean(team_trust_scores)
+        except Exception as e:
+            print(f"Error calculating team_trust_avg: {e}")
+            team_trust_avg = 'N/A'
+
+        # Calculate Gaps
+        try:
+            if isinstance(ceo_delegation_avg, (int, float)) and isinstance(team_delegation_avg, (int, float)):
+                delegation_gap = ceo_delegation_avg - team_delegation_avg
+            else:
+                delegation_gap = 'N/A'
+        except Exception as e:
+            print(f"Error calculating delegation_gap: {e}")
+            delegation_gap = 'N/A'
+
+        try:
+            if isinstance(ceo_trust_avg, (int, float)) and isinstance(team_trust_avg, (int, float)):
+                trust_gap = ceo_trust_avg - team_trust_avg
+            else:
+                trust_gap = 'N/A'
+        except Exception as e:
+            print(f"Error calculating trust_gap: {e}")
+            trust_gap = 'N/A'
+
+        metrics = {
+            'ceo_delegation_scores': ceo_delegation_scores,
+            'ceo_trust_scores': ceo_trust_scores,
+            'team_delegation_scores': team_delegation_scores,
+            'team_trust_scores': team_trust_scores,
+            'ceo_delegation_avg': ceo_delegation_avg,
+            'ceo_trust_avg': ceo_trust_avg,
+            'team_delegation_avg': team_delegation_avg,
+            'team_trust_avg': team_trust_avg,
+            'delegation_gap': delegation_gap,
+            'trust_gap': trust_gap
+        }
+    except Exception as e:
+        print(f"Error in calculate_metrics: {e}")
+        metrics = {
+            'ceo_delegation_scores': [],
+            'ceo_trust_scores': [],
+            'team_delegation_scores': [],
+            'team_trust_scores': [],
+            'ceo_delegation_avg': 'N/A',
+            'ceo_trust_avg': 'N/A',
+            'team_delegation_avg': 'N/A',
+            'team_trust_avg': 'N/A',
+            'delegation_gap': 'N/A',
+            'trust_gap': 'N/A'
+        }
+
+    return metrics
+
+def generate_gpt_analysis(input_data, metrics, summary_data):
+    """
+    Generate comprehensive analysis using GPT.
+    """
+    try:
+        return cached_completion(
+            client,
+            model="gpt-4o-mini",
+            system_prompt=SURVEY_ANALYSIS_PROMPT,
+            user_payload={"input_data": input_data, "metrics": metrics, "summary_data": summary_data},
+            response_format={"type": "json_object"}
+        )
+    except Exception as e:
+        st.error(f"Error generating report: {e}")
+        return None
+def generate_gpt_analysis2(input_data, metrics, summary_data):
+        try:
+            return cached_completion(
+                client,
                 model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": json.dumps({"input_data": input_data, "metrics": metrics, "summary_data": summary_data})}
-                ],
+                system_prompt=TRUST_ANALYSIS_PROMPT,
+                user_payload={"input_data": input_data, "metrics": metrics, "summary_data": summary_data},
                 response_format={"type": "json_object"}
             )
-            return response.choices[0].message.content
         except Exception as e:
             st.error(f"Error generating report: {e}")
             return None
 def generate_heatmaps(metrics):
     """
-    Generate heatmaps and bar charts for delegation and trust scores.
-    """
-    # Create temporary files for images
-    delegation_heatmap_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png').name
-    trust_heatmap_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png').name
+    Build the delegation and trust heatmap sections for the survey report.
 
-    # Delegation Heatmap
-    try:
-        if isinstance(metrics['ceo_delegation_scores'], list) and isinstance(metrics['team_delegation_scores'], list):
-            plt.figure(figsize=(10, 6))
-            data = [metrics['ceo_delegation_scores'], metrics['team_delegation_scores']]
-            plt.imshow(data, cmap='coolwarm', aspect='auto')
-            plt.colorbar(label='Scores')
-            plt.yticks([0,1], ['CEO', 'Team'])
-            plt.title('Delegation Dynamics Heatmap')
-            plt.savefig(delegation_heatmap_file, bbox_inches='tight')
-            plt.close()
-        else:
-            raise ValueError("Delegation scores are not available.")
-    except Exception as e:
-        print(f"Error generating delegation heatmap: {e}")
-        # Create a placeholder image
-        plt.figure(figsize=(5, 1))
-        plt.text(0.5, 0.5, 'Delegation Heatmap Not Available', horizontalalignment='center', verticalalignment='center')
-        plt.axis('off')
-        plt.savefig(delegation_heatmap_file, bbox_inches='tight')
-        plt.close()
-
-    # Trust Heatmap
-    try:
-        if isinstance(metrics['ceo_trust_scores'], list) and isinstance(metrics['team_trust_scores'], list):
-            plt.figure(figsize=(10, 6))
-            data = [metrics['ceo_trust_scores'], metrics['team_trust_scores']]
-            plt.imshow(data, cmap='coolwarm', aspect='auto')
-            plt.colorbar(label='Scores')
-            plt.yticks([0,1], ['CEO', 'Team'])
-            plt.title('Trust Dynamics Heatmap')
-            plt.savefig(trust_heatmap_file, bbox_inches='tight')
-            plt.close()
-        else:
-            raise ValueError("Trust scores are not available.")
-    except Exception as e:
-        print(f"Error generating trust heatmap: {e}")
-        # Create a placeholder image
-        plt.figure(figsize=(5, 1))
-        plt.text(0.5, 0.5, 'Trust Heatmap Not Available', horizontalalignment='center', verticalalignment='center')
-        plt.axis('off')
-        plt.savefig(trust_heatmap_file, bbox_inches='tight')
-        plt.close()
+    The heatmaps are drawn as ReportLab vector graphics from the CEO and team score
+    rows; a section with no rows renders as a "not available" placeholder.
+    """
+    heatmaps = []
+    for label, ceo_key, team_key in (
+        ('Delegation', 'ceo_delegation_scores', 'team_delegation_scores'),
+        ('Trust', 'ceo_trust_scores', 'team_trust_scores'),
+    ):
+        heatmap = {
+            "type": "heatmap",
+            "title": f"{label} Dynamics Heatmap",
+            "rows": None,
+            "width": 400,
+            "height": 200,
+            "placeholder": f"{label} Heatmap Not Available (N/A)",
+            "cache": True,
+        }
+        try:
+            if not (isinstance(metrics[ceo_key], list) and isinstance(metrics[team_key], list)):
+                raise ValueError(f"{label} scores are not available.")
+            heatmap["rows"] = [
+                ["CEO", [float(score) for score in metrics[ceo_key]]],
+                ["Team", [float(score) for score in metrics[team_key]]],
+            ]
+        except Exception as e:
+            print(f"Error generating {label.lower()} heatmap: {e}")
+        heatmaps.append(heatmap)
 
-    return delegation_heatmap_file, trust_heatmap_file
+    delegation_heatmap, trust_heatmap = heatmaps
+    return delegation_heatmap, trust_heatmap
 
-def create_pdf_survey(input_data, metrics, gpt_analysis, delegation_heatmap_file, trust_heatmap_file):
+def survey_report(input_data, metrics, gpt_analysis, delegation_heatmap, trust_heatmap):
     """
-    Create a comprehensive PDF report.
+    Build the report dict for the comprehensive survey report.
+    The heatmaps are the sections returned by generate_heatmaps.
     """
-    # Create temporary PDF file
-    temp_pdf = tempfile.mktemp(".pdf")
-    doc = SimpleDocTemplate(temp_pdf, pagesize=letter)
     gpt_analysis = json.loads(gpt_analysis)
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle('TitleStyle', parent=styles['Title'], alignment=1)
-    heading_style = ParagraphStyle('HeadingStyle', parent=styles['Heading2'], spaceAfter=6)
-    normal_style = styles['Normal']
-    bullet_style = styles['Bullet']
-
-    # Build story (content)
-    story = []
-
-    # Title
-    story.append(Paragraph("Trust and Delegation Effectiveness Survey Analysis", title_style))
-    story.append(Spacer(1, 12))
-
-    # Summary of Results
-    story.append(Paragraph("Summary of Results", heading_style))
-
-    wrap_style = styles['Normal']
-    wrap_style.fontSize = 8  # Reduce font size for better fit
-    wrap_style.leading = 10  # Adjust line spacing
-
-    data = [
-    [
-        Paragraph('Statement', wrap_style),
-        Paragraph('CEO Score', wrap_style),
-        Paragraph('Team Score', wrap_style),
-        Paragraph('Gap', wrap_style),
-        Paragraph('Significant Gap?', wrap_style),
-        Paragraph('Observations', wrap_style)
-    ]
-]
 
-    for key in input_data['CEO Input']['Delegation Dynamics']:
-        ceo_question = input_data['CEO Input']['Delegation Dynamics'][key]
-        team_question = input_data['Leadership Team']['Delegation Dynamics'][key]
-        ceo_score = ceo_question['score']
-        team_score = team_question['score']
-        gap = ceo_score - team_score
-        significant_gap = 'Yes' if abs(gap) > 2 else 'No'
-        observation = "Weak perception of clarity." if significant_gap == 'Yes' else "No significant misalignment."
+    # The summary table sent to GPT, without its header row
+    rows = build_summary_data(input_data)[1:]
+
+    sections = [
+        {"type": "title", "text": "Trust and Delegation Effectiveness Survey Analysis"},
+
+        # Summary of Results
+        {"type": "heading", "text": "Summary of Results", "style": "heading_compact"},
+        {
+            "type": "table",
+            "header": ['Statement', 'CEO Score', 'Team Score', 'Gap', 'Significant Gap?', 'Observations'],
+            "rows": rows,
+            # More space for the 'Statement' and 'Observations' columns, which wrap
+            "col_widths": [200, 40, 60, 40, 60, 140],
+            "wrap_columns": [0, 5],
+            # Built from survey scores only, so it is reused while they are unchanged
+            "cache": True,
+        },
+        {"type": "spacer"},
+        {"type": "paragraph", "text": "---"},
+        {"type": "spacer"},
+
+        # Heatmaps
+        {"type": "heading", "text": "Delegation Dynamics Heatmap", "style": "heading_compact"},
+        {"type": "spacer"},
+        delegation_heatmap,
+        {"type": "spacer"},
+        {"type": "heading", "text": "Trust Dynamics Heatmap", "style": "heading_compact"},
+        {"type": "spacer"},
+        trust_heatmap,
+        {"type": "spacer"},
+        {"type": "paragraph", "text": "---"},
+        {"type": "spacer"},
+    ]
 
-        # Use Paragraph for wrapping text in the 'Statement' and 'Observations' columns
-        statement_paragraph = Paragraph(ceo_question['question'], wrap_style)
-        observation_paragraph = Paragraph(observation, wrap_style)
+    # GPT analysis, one bulleted block per key
+    analysis_sections = [
+        ("Summary", 'summary_of_results'),
+        ("Outlier assessment", 'outliers'),
+        ("Analysis of Gaps", 'analysis_of_gaps'),
+        ("Recommendations for the CEO’s Mandate", 'recommendations'),
+        ("Next Steps", 'next_steps'),
+        ("Final Observation", 'final_observation'),
+    ]
+    for heading, key in analysis_sections:
+        sections += [
+            {"type": "heading", "text": heading, "style": "heading_compact"},
+            {"type": "bullets", "items": gpt_analysis.get(key, [])},
+            {"type": "spacer"},
+        ]
 
-        data.append([
-            statement_paragraph,
-            ceo_score,
-            f"{team_score:.1f}",
-            f"{gap:.1f}",
-            significant_gap,
-            observation_paragraph
-        ])
+    return {"sections": sections}
 
-    # Adjust column widths to allocate more space for the 'Statement' and 'Observations' columns
-    table = Table(data, colWidths=[200, 40, 60, 40, 60, 140])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#D3D3D3')),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
-    ]))
-
-    # Add the table to the story
-    story.append(table)
-    story.append(Spacer(1, 12))
-    story.append(Paragraph("---", normal_style))
-    story.append(Spacer(1, 12))
-
-    # # Outliers Section
-    # story.append(Paragraph("Outliers", heading_style))
-    # # Since individual team member scores are not provided, this section is left empty.
-    # story.append(Paragraph("Leadership Team Scores with Significant Deviations", styles['Heading3']))
-    # story.append(Paragraph("No outlier data available.", normal_style))
-    # story.append(Spacer(1, 12))
-
-    # story.append(Paragraph("---", normal_style))
-    # story.append(Spacer(1, 12))
-
-    # Heatmaps
-    story.append(Paragraph("Delegation Dynamics Heatmap", heading_style))
-    story.append(Spacer(1, 12))
-    story.append(ReportLabImage(delegation_heatmap_file, width=400, height=200))
-    story.append(Spacer(1, 12))
-
-    story.append(Paragraph("Trust Dynamics Heatmap", heading_style))
-    story.append(Spacer(1, 12))
-    story.append(ReportLabImage(trust_heatmap_file, width=400, height=200))
-    story.append(Spacer(1, 12))
-
-    story.append(Paragraph("---", normal_style))
-    story.append(Spacer(1, 12))
-    
-    try:
-        story.append(Paragraph("Summary", heading_style))
-        for item in gpt_analysis.get('summary_of_results', []):
-            story.append(Paragraph(f"• {item}", normal_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
-    try:
-        story.append(Paragraph("Outlier assessment", heading_style))
-        for item in gpt_analysis.get('outliers', []):
-            story.append(Paragraph(f"• {item}", normal_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
-    try:
-        story.append(Paragraph("Analysis of Gaps", heading_style))
-        for item in gpt_analysis.get('analysis_of_gaps', []):
-            story.append(Paragraph(f"• {item}", normal_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
 
-    # Recommendations
-    try:
-        story.append(Paragraph("Recommendations for the CEO’s Mandate", heading_style))
-        for item in gpt_analysis.get('recommendations', []):
-            story.append(Paragraph(f"• {item}", normal_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
-    # Next Steps
-    try:
-        story.append(Paragraph("Next Steps", heading_style))
-        for item in gpt_analysis.get('next_steps', []):
-            story.append(Paragraph(f"• {item}", normal_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
-
-    # Final Observation
-    try:
-        story.append(Paragraph("Final Observation", heading_style))
-        for item in gpt_analysis.get('final_observation', []):
-            story.append(Paragraph(f"• {item}", normal_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
+def create_pdf_survey(input_data, metrics, gpt_analysis, delegation_heatmap, trust_heatmap):
+    """
+    Create a comprehensive PDF report and return its bytes.
+    """
+    return render_service.render_report(survey_report(input_data, metrics, gpt_analysis, delegation_heatmap, trust_heatmap))
 
-    # Build PDF
-    doc.build(story)
 
-    return temp_pdf
-def create_pdf_trust(report_data):
+def trust_report(report_data, metrics=None):
     """
-    Create a PDF from the GPT-generated JSON report.
+    Build the report dict for the GPT-generated trust report.
+    The analysis and survey metrics are embedded as the PDF's report.json.
     """
-    # Create a temporary file
-    temp_pdf = tempfile.mktemp(".pdf")
     report_data = json.loads(report_data)
-    # Create PDF document
-    doc = SimpleDocTemplate(temp_pdf, pagesize=letter)
-    
-    # Get styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle('TitleStyle', parent=styles['Title'], alignment=1)
-    heading_style = styles['Heading2']
-    normal_style = styles['Normal']
-    bullet_style = ParagraphStyle('BulletStyle', parent=normal_style, bulletIndent=20)
-
-    # Build story (content)
-    story = []
-
-    # Title
-    story.append(Paragraph("Leadership Trust Report", title_style))
-    story.append(Spacer(1, 12))
+
+    def gap_sections(gaps):
+        return [
+            {"type": "paragraph", "text": "<b>Red-Level Issues:</b>"},
+            {"type": "bullets", "items": gaps.get('red_issues', []), "style": "bullet"},
+            {"type": "paragraph", "text": "<b>Orange-Level Issues:</b>"},
+            {"type": "bullets", "items": gaps.get('orange_issues', []), "style": "bullet"},
+            {"type": "paragraph", "text": "<b>Green-Level Strengths:</b>"},
+            {"type": "bullets", "items": gaps.get('green_strengths', []), "style": "bullet"},
+            {"type": "spacer"},
+        ]
+
+    def score_items(scores):
+        return [
+            f"{score['aspect']}: CEO Score: {score['ceo_score']}, Team Avg: {score['team_avg']}, Gap: {score['gap']}, Level: {score['level']}"
+            for score in scores
+        ]
+
+    sections = [{"type": "title", "text": "Leadership Trust Report"}]
     try:
         # Top Strategic Priorities
-        story.append(Paragraph("Top Strategic Priorities:", heading_style))
-        for priority in report_data.get('strategic_priorities', []):
-            story.append(Paragraph(f"• <b>{priority['priority']}</b>: {priority['rationale']}", normal_style))
-        story.append(Spacer(1, 12))
+        sections += [
+            {"type": "heading", "text": "Top Strategic Priorities:"},
+            {"type": "bullets", "items": [f"<b>{priority['priority']}</b>: {priority['rationale']}" for priority in report_data.get('strategic_priorities', [])]},
+            {"type": "spacer"},
+        ]
     except:
         pass
     try:
         # Delegation and Trust Analysis
-        story.append(Paragraph("Delegation and Trust Analysis:", heading_style))
-
-        # Delegation Dynamics
         delegation = report_data.get('delegation_dynamics', {})
-        story.append(Paragraph("Delegation Dynamics - Current Status:", heading_style))
-        story.append(Paragraph(delegation.get('current_status', 'No data available'), normal_style))
-        story.append(Spacer(1, 12))
+        sections += [
+            {"type": "heading", "text": "Delegation and Trust Analysis:"},
+            {"type": "heading", "text": "Delegation Dynamics - Current Status:"},
+            {"type": "paragraph", "text": delegation.get('current_status', 'No data available')},
+            {"type": "spacer"},
+            {"type": "heading", "text": "Delegation Dynamics - Key Gaps:"},
+        ] + gap_sections(delegation.get('key_gaps', {}))
     except:
         pass
-    try:
-        # Delegation Gaps
-        gaps = delegation.get('key_gaps', {})
-        story.append(Paragraph("Delegation Dynamics - Key Gaps:", heading_style))
-        story.append(Paragraph("<b>Red-Level Issues:</b>", normal_style))
-        for issue in gaps.get('red_issues', []):
-            story.append(Paragraph(f"• {issue}", bullet_style))
-        
-        story.append(Paragraph("<b>Orange-Level Issues:</b>", normal_style))
-        for issue in gaps.get('orange_issues', []):
-            story.append(Paragraph(f"• {issue}", bullet_style))
-        
-        story.append(Paragraph("<b>Green-Level Strengths:</b>", normal_style))
-        for strength in gaps.get('green_strengths', []):
-            story.append(Paragraph(f"• {strength}", bullet_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
-
     try:
         # Trust Dynamics
         trust = report_data.get('trust_dynamics', {})
-        story.append(Paragraph("Trust Dynamics - Current Status:", heading_style))
-        story.append(Paragraph(trust.get('current_status', 'No data available'), normal_style))
-        
-        # Trust Gaps
-        gaps = trust.get('key_gaps', {})
-        story.append(Paragraph("Trust Dynamics - Key Gaps:", heading_style))
-        story.append(Paragraph("<b>Red-Level Issues:</b>", normal_style))
-        for issue in gaps.get('red_issues', []):
-            story.append(Paragraph(f"• {issue}", bullet_style))
-        
-        story.append(Paragraph("<b>Orange-Level Issues:</b>", normal_style))
-        for issue in gaps.get('orange_issues', []):
-            story.append(Paragraph(f"• {issue}", bullet_style))
-        
-        story.append(Paragraph("<b>Green-Level Strengths:</b>", normal_style))
-        for strength in gaps.get('green_strengths', []):
-            story.append(Paragraph(f"• {strength}", bullet_style))
-        story.append(Spacer(1, 12))
+        sections += [
+            {"type": "heading", "text": "Trust Dynamics - Current Status:"},
+            {"type": "paragraph", "text": trust.get('current_status', 'No data available')},
+            {"type": "heading", "text": "Trust Dynamics - Key Gaps:"},
+        ] + gap_sections(trust.get('key_gaps', {}))
     except:
         pass
-    
     try:
         # Recommendations
-        story.append(Paragraph("Recommendations:", heading_style))
-        for rec in report_data.get('recommendations', []):
-            story.append(Paragraph(f"• <b>{rec['action']}</b> - Priority: {rec['priority']}", normal_style))
-        story.append(Spacer(1, 12))
+        sections += [
+            {"type": "heading", "text": "Recommendations:"},
+            {"type": "bullets", "items": [f"<b>{rec['action']}</b> - Priority: {rec['priority']}" for rec in report_data.get('recommendations', [])]},
+            {"type": "spacer"},
+        ]
     except:
         pass
     try:
         # Next Steps
-        story.append(Paragraph("Next Steps:", heading_style))
         next_steps = report_data.get('next_steps', {})
-        
-        story.append(Paragraph("<b>Immediate Actions:</b>", normal_style))
-        for action in next_steps.get('immediate_actions', []):
-            story.append(Paragraph(f"• {action}", bullet_style))
-        
-        story.append(Paragraph("<b>Mid-Term Goals:</b>", normal_style))
-        for goal in next_steps.get('mid_term_goals', []):
-            story.append(Paragraph(f"• {goal}", bullet_style))
-        
-        story.append(Paragraph("<b>Long-Term Strategy:</b>", normal_style))
-        for strategy in next_steps.get('long_term_strategy', []):
-            story.append(Paragraph(f"• {strategy}", bullet_style))
-        story.append(Spacer(1, 12))
+        sections += [
+            {"type": "heading", "text": "Next Steps:"},
+            {"type": "paragraph", "text": "<b>Immediate Actions:</b>"},
+            {"type": "bullets", "items": next_steps.get('immediate_actions', []), "style": "bullet"},
+            {"type": "paragraph", "text": "<b>Mid-Term Goals:</b>"},
+            {"type": "bullets", "items": next_steps.get('mid_term_goals', []), "style": "bullet"},
+            {"type": "paragraph", "text": "<b>Long-Term Strategy:</b>"},
+            {"type": "bullets", "items": next_steps.get('long_term_strategy', []), "style": "bullet"},
+            {"type": "spacer"},
+        ]
     except:
         pass
-
     try:
         # Heatmap Summary
-        story.append(Paragraph("Heatmap Summary:", heading_style))
         heatmap = report_data.get('heatmap_summary', {})
-        
-        story.append(Paragraph("<b>Delegation Scores:</b>", normal_style))
-        for score in heatmap.get('delegation_scores', []):
-            story.append(Paragraph(
-                f"• {score['aspect']}: CEO Score: {score['ceo_score']}, Team Avg: {score['team_avg']}, Gap: {score['gap']}, Level: {score['level']}",
-                normal_style
-            ))
-
-        story.append(Paragraph("<b>Trust Scores:</b>", normal_style))
-        for score in heatmap.get('trust_scores', []):
-            story.append(Paragraph(
-                f"• {score['aspect']}: CEO Score: {score['ceo_score']}, Team Avg: {score['team_avg']}, Gap: {score['gap']}, Level: {score['level']}",
-                normal_style
-            ))
-        story.append(Spacer(1, 12))
+        sections += [
+            {"type": "heading", "text": "Heatmap Summary:"},
+            {"type": "paragraph", "text": "<b>Delegation Scores:</b>"},
+            {"type": "bullets", "items": score_items(heatmap.get('delegation_scores', []))},
+            {"type": "paragraph", "text": "<b>Trust Scores:</b>"},
+            {"type": "bullets", "items": score_items(heatmap.get('trust_scores', []))},
+            {"type": "spacer"},
+        ]
     except:
         pass
+    # Final Observation
+    sections += [
+        {"type": "heading", "text": "Final Observation:"},
+        {"type": "paragraph", "text": report_data.get('final_observation', 'No observation available')},
+        {"type": "spacer"},
+    ]
 
-    try:
-        # Final Observation
-        story.append(Paragraph("Final Observation:", heading_style))
-        story.append(Paragraph(report_data.get('final_observation', 'No observation available'), normal_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
+    return {"sections": sections, "report_type": "leadership_trust", "payload": {"analysis": report_data, "metrics": metrics}}
 
-    # Build the PDF
-    doc.build(story)
 
-    return temp_pdf
+def create_pdf_trust(report_data, metrics=None):
+    """
+    Create a PDF from the GPT-generated JSON report and return its bytes.
+    """
+    return render_service.render_report(trust_report(report_data, metrics))
 
-def generate_leadership_report(input_data):
+def build_summary_data(input_data):
     """
-    Generate a comprehensive leadership report.
+    Build the CEO-vs-team delegation summary table sent to GPT alongside the metrics.
     """
-    # Calculate metrics
-    metrics = calculate_metrics(input_data)
     summary_data = [['Statement', 'CEO Score', 'Team Avg. Score', 'Gap', 'Significant Gap?', 'Observations']]
-
     for key in input_data['CEO Input']['Delegation Dynamics']:
         ceo_question = input_data['CEO Input']['Delegation Dynamics'][key]
         team_question = input_data['Leadership Team']['Delegation Dynamics'][key]
@@ -702,24 +540,111 @@ def generate_leadership_report(input_data):
             significant_gap,
             observation
         ])
+    return summary_data
 
-    # Generate GPT Analysis
-    gpt_analysis1 = generate_gpt_analysis(input_data, metrics, summary_data)
-    if not gpt_analysis1:
-        print("Failed to generate GPT analysis.")
-        return None
-    gpt_analysis2 = generate_gpt_analysis2(input_data, metrics, summary_data)
+
+def _timed(timings, stage, func, *args):
+    """
+    Run func(*args) and record its wall-clock duration (seconds) under timings[stage].
+    """
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+
+def _attach_script_ctx(ctx):
+    """
+    Thread pool initializer so st.* calls made from worker threads reach the calling session.
+    """
+    if ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+
+def _trust_pipeline(input_data, metrics, summary_data, timings, render=True):
+    """
+    Run the second GPT analysis and build the trust PDF (or report dict) as soon as it arrives.
+    """
+    gpt_analysis2 = _timed(timings, "gpt_analysis2", generate_gpt_analysis2, input_data, metrics, summary_data)
     if not gpt_analysis2:
-        print("Failed to generate GPT analysis.")
         return None
-    # Generate Heatmaps
-    delegation_heatmap_file, trust_heatmap_file = generate_heatmaps(metrics)
+    if not render:
+        return trust_report(gpt_analysis2, metrics)
+    return _timed(timings, "pdf_trust", create_pdf_trust, gpt_analysis2, metrics)
+
+
+def print_timings(timings):
+    """
+    Print a per-stage timing breakdown of a report run.
+    """
+    breakdown = ", ".join(f"{stage}: {seconds:.2f}s" for stage, seconds in timings.items())
+    print(f"Leadership report timings - {breakdown}")
+
+
+def generate_leadership_report(input_data, concurrent=True, timings=None, render=True):
+    """
+    Generate a comprehensive leadership report.
+
+    In concurrent mode the two GPT analyses run at the same time, the heatmaps are
+    rendered while they are in flight and each PDF is built as soon as its analysis
+    arrives. Per-stage durations in seconds are written into `timings` if a dict is given.
+    With render=False the survey and trust report dicts are returned instead of PDFs,
+    for pages that show the reports first and render PDFs only on download.
+    """
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+
+    # Calculate metrics
+    metrics = _timed(timings, "metrics", calculate_metrics, input_data)
+    summary_data = build_summary_data(input_data)
+
+    if not concurrent:
+        # Generate GPT Analysis
+        gpt_analysis1 = _timed(timings, "gpt_analysis", generate_gpt_analysis, input_data, metrics, summary_data)
+        if not gpt_analysis1:
+            print("Failed to generate GPT analysis.")
+            return None
+        gpt_analysis2 = _timed(timings, "gpt_analysis2", generate_gpt_analysis2, input_data, metrics, summary_data)
+        if not gpt_analysis2:
+            print("Failed to generate GPT analysis.")
+            return None
+        # Generate Heatmaps
+        delegation_heatmap, trust_heatmap = _timed(timings, "heatmaps", generate_heatmaps, metrics)
+
+        # Create PDF
+        if render:
+            survey_pdf = _timed(timings, "pdf_survey", create_pdf_survey, input_data, metrics, gpt_analysis1, delegation_heatmap, trust_heatmap)
+            trust_pdf = _timed(timings, "pdf_trust", create_pdf_trust, gpt_analysis2, metrics)
+        else:
+            survey_pdf = survey_report(input_data, metrics, gpt_analysis1, delegation_heatmap, trust_heatmap)
+            trust_pdf = trust_report(gpt_analysis2, metrics)
+    else:
+        # Both LLM calls go out immediately; heatmaps render on this thread meanwhile
+        ctx = get_script_run_ctx()
+        with ThreadPoolExecutor(max_workers=2, initializer=_attach_script_ctx, initargs=(ctx,)) as pool:
+            survey_future = pool.submit(_timed, timings, "gpt_analysis", generate_gpt_analysis, input_data, metrics, summary_data)
+            trust_future = pool.submit(_trust_pipeline, input_data, metrics, summary_data, timings, render)
+
+            delegation_heatmap, trust_heatmap = _timed(timings, "heatmaps", generate_heatmaps, metrics)
+
+            gpt_analysis1 = survey_future.result()
+            if not gpt_analysis1:
+                print("Failed to generate GPT analysis.")
+                return None
+            if render:
+                survey_pdf = _timed(timings, "pdf_survey", create_pdf_survey, input_data, metrics, gpt_analysis1, delegation_heatmap, trust_heatmap)
+            else:
+                survey_pdf = survey_report(input_data, metrics, gpt_analysis1, delegation_heatmap, trust_heatmap)
 
-    # Create PDF
-    pdf_path1 = create_pdf_survey(input_data, metrics, gpt_analysis1, delegation_heatmap_file, trust_heatmap_file)
-    pdf_path2 = create_pdf_trust(gpt_analysis2)
-    return pdf_path1, pdf_path2
+            trust_pdf = trust_future.result()
+            if not trust_pdf:
+                print("Failed to generate GPT analysis.")
+                return None
 
+    timings["total"] = time.perf_counter() - start
+    print_timings(timings)
+    return survey_pdf, trust_pdf
 
 if __name__ == "__main__":
     input_data = {
@@ -896,6 +821,9 @@ if __name__ == "__main__":
         }
     }
 }
-    pdf_path1, pdf_path2 = generate_leadership_report(input_data)
-    print(pdf_path1, pdf_path2)
+    survey_pdf, trust_pdf = generate_leadership_report(input_data)
+    for name, pdf_bytes in (("Survey_Report.pdf", survey_pdf), ("Trust_Report.pdf", trust_pdf)):
+        with open(name, "wb") as f:
+            f.write(pdf_bytes)
+        print(f"PDF Report generated at: {name}")
 
@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import gpt2_backend
+from llm_cache import acached_completion
+from openai_client import get_async_client
+
+CHECKPOINT_FILE = "checkpoint.jsonl"
+SURVEY_KEYS = ("CEO Input", "Leadership Team")
+
+
+def _survey_data(record):
+    if not isinstance(record, dict):
+        raise ValueError("payload is not a JSON object")
+    missing = [key for key in SURVEY_KEYS if key not in record]
+    if missing:
+        raise ValueError(f"payload is missing {', '.join(missing)}")
+    return {key: record[key] for key in SURVEY_KEYS}
+
+
+def load_payloads(source):
+    """
+    Yield (payload_id, survey_data, error) triples from a directory of .json files or a JSONL file.
+
+    Each payload is in the gpt2.py shape {"CEO Input": ..., "Leadership Team": ...}.
+    JSONL records may carry an "id"; otherwise the line number is used. A payload that
+    cannot be read or lacks a survey key has survey_data None and the reason in error.
+    """
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if not name.endswith(".json"):
+                continue
+            payload_id = os.path.splitext(name)[0]
+            try:
+                with open(os.path.join(source, name), "r", encoding="utf-8") as f:
+                    yield payload_id, _survey_data(json.load(f)), None
+            except (OSError, ValueError) as e:
+                yield payload_id, None, str(e)
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                payload_id = f"line{line_number}"
+                try:
+                    record = json.loads(line)
+                    if isinstance(record, dict):
+                        payload_id = str(record.get("id", payload_id))
+                    yield payload_id, _survey_data(record), None
+                except ValueError as e:
+                    yield payload_id, None, str(e)
+
+
+def load_checkpoint(out_dir):
+    """
+    Return the ids already completed by an earlier run into out_dir.
+    """
+    done = set()
+    path = os.path.join(out_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # partial line from an interrupted write
+            if entry.get("status") == "done":
+                done.add(entry["id"])
+    return done
+
+
+def record_checkpoint(out_dir, entry):
+    with open(os.path.join(out_dir, CHECKPOINT_FILE), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def render_reports(payload_id, input_data, metrics, gpt_analysis1, gpt_analysis2, out_dir):
+    """
+    Render both PDFs for one payload. Runs in a worker process.
+    """
+    start = time.perf_counter()
+    delegation_heatmap, trust_heatmap = gpt2_backend.generate_heatmaps(metrics)
+    reports = {
+        f"{payload_id}_Survey_Report.pdf": gpt2_backend.create_pdf_survey(input_data, metrics, gpt_analysis1, delegation_heatmap, trust_heatmap),
+        f"{payload_id}_Trust_Report.pdf": gpt2_backend.create_pdf_trust(gpt_analysis2, metrics),
+    }
+    for name, pdf_bytes in reports.items():
+        # Write then rename, so a crash never leaves a truncated PDF behind
+        path = os.path.join(out_dir, name)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(f"{path}.tmp", path)
+    survey_pdf, trust_pdf = (os.path.join(out_dir, name) for name in reports)
+    return survey_pdf, trust_pdf, time.perf_counter() - start
+
+
+async def process_payload(payload_id, input_data, out_dir, pool, limit):
+    """
+    Run both GPT analyses for one payload concurrently, then render its PDFs in the pool.
+
+    Returns the payload's checkpoint entry, with status "failed" if any step raised.
+    """
+    try:
+        return await _generate_reports(payload_id, input_data, out_dir, pool, limit)
+    except Exception as e:
+        print(f"Failed to generate reports for {payload_id}: {e}")
+        return {"id": payload_id, "status": "failed", "error": str(e)}
+
+
+async def _generate_reports(payload_id, input_data, out_dir, pool, limit):
+    async with limit:
+        start = time.perf_counter()
+        metrics = gpt2_backend.calculate_metrics(input_data)
+        summary_data = gpt2_backend.build_summary_data(input_data)
+        user_payload = {"input_data": input_data, "metrics": metrics, "summary_data": summary_data}
+
+        client = get_async_client()
+        gpt_analysis1, gpt_analysis2 = await asyncio.gather(
+            acached_completion(client, model="gpt-4o-mini", system_prompt=gpt2_backend.SURVEY_ANALYSIS_PROMPT,
+                               user_payload=user_payload, response_format={"type": "json_object"}),
+            acached_completion(client, model="gpt-4o-mini", system_prompt=gpt2_backend.TRUST_ANALYSIS_PROMPT,
+                               user_payload=user_payload, response_format={"type": "json_object"}),
+        )
+        llm_seconds = time.perf_counter() - start
+
+        loop = asyncio.get_running_loop()
+        survey_pdf, trust_pdf, render_seconds = await loop.run_in_executor(
+            pool, render_reports, payload_id, input_data, metrics, gpt_analysis1, gpt_analysis2, out_dir
+        )
+        return {
+            "id": payload_id,
+            "status": "done",
+            "survey_pdf": survey_pdf,
+            "trust_pdf": trust_pdf,
+            "llm_seconds": round(llm_seconds, 3),
+            "render_seconds": round(render_seconds, 3),
+        }
+
+
+async def run_batch(source, out_dir, concurrency=8, workers=None):
+    """
+    Generate survey and trust reports for every payload in source, resuming from out_dir's checkpoint.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    done = load_checkpoint(out_dir)
+    pending = []
+    completed = failed = 0
+    for payload_id, data, error in load_payloads(source):
+        if payload_id in done:
+            continue
+        if error is not None:
+            # A bad record is skipped rather than stopping the batch
+            failed += 1
+            print(f"Skipping payload {payload_id}: {error}")
+            record_checkpoint(out_dir, {"id": payload_id, "status": "failed", "error": error})
+            continue
+        pending.append((payload_id, data))
+    print(f"{len(done)} payloads already done, {len(pending)} to generate, {failed} unreadable.")
+
+    limit = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tasks = [process_payload(payload_id, data, out_dir, pool, limit) for payload_id, data in pending]
+        # Checkpoint each payload as soon as it finishes, so an interrupt loses no finished work
+        for finished, task in enumerate(asyncio.as_completed(tasks), 1):
+            entry = await task
+            record_checkpoint(out_dir, entry)
+            if entry["status"] != "done":
+                failed += 1
+                continue
+            completed += 1
+            print(f"[{finished}/{len(pending)}] {entry['id']}: llm {entry['llm_seconds']}s, render {entry['render_seconds']}s")
+
+    elapsed = time.perf_counter() - start
+    per_minute = completed / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"Generated {completed} reports ({failed} failed) in {elapsed:.1f}s - {per_minute:.1f} reports/min")
+    return completed, failed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-generate Trust and Delegation survey reports.")
+    parser.add_argument("source", help="Directory of .json survey payloads or a JSONL file")
+    parser.add_argument("--out", default="batch_reports", help="Output directory for PDFs and the checkpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="Payloads in flight at once")
+    parser.add_argument("--workers", type=int, default=None, help="PDF rendering processes (default: CPU count)")
+    args = parser.parse_args()
+    asyncio.run(run_batch(args.source, args.out, concurrency=args.concurrency, workers=args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import streamlit as st
 import json
-from gpt3_backend import create_pdf
+from gpt3_backend import time_liberation_report
+from report_output import lazy_pdf, show_report
 
 def main():
     st.set_page_config(page_title="CEO Task Prioritization", page_icon="📋")
@@ -121,16 +122,17 @@ def main():
             "Time Spend Areas": current_time_spend
         }
 
-        # Call the create_pdf function
+        # Show the report straight away; the PDF is rendered only when downloaded
         try:
-            pdf_path = create_pdf(survey_data)
-            with open(pdf_path, "rb") as pdf_file:
-                st.download_button(
-                    label="Download Report",
-                    data=pdf_file,
-                    file_name="TimeLiberationMatrixReport.pdf",
-                    mime="application/pdf"
-                )
+            report = time_liberation_report(survey_data)
+            show_report(report)
+            st.download_button(
+                label="Download Report",
+                data=lazy_pdf(report),
+                file_name="TimeLiberationMatrixReport.pdf",
+                mime="application/pdf",
+                on_click="ignore"
+            )
         except Exception as e:
             st.error(f"Failed to generate reports: {e}")
 
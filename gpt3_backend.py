@@ -1,15 +1,11 @@
 import json
-import tempfile
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from openai import OpenAI
+from render_service import render_service
+from openai_client import get_client
 import streamlit as st
+from llm_cache import cached_completion
 
 # Set up OpenAI API
-api_key = st.secrets["OPENAI_API_KEY"]
-client = OpenAI(api_key=api_key)
+client = get_client()
 
 def analyze_tasks(input_data):
     """
@@ -102,103 +98,83 @@ def generate_gpt_analysis(task_matrix, observations):
     
     """
     try:
-        response = client.chat.completions.create(
+        content = cached_completion(
+            client,
             model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": json.dumps({"task_matrix": task_matrix, "observations": observations})}
-            ],
+            system_prompt=system_prompt,
+            user_payload={"task_matrix": task_matrix, "observations": observations},
             response_format={"type": "json_object"}
         )
-        return json.loads(response.choices[0].message.content)
+        return json.loads(content)
     except Exception as e:
         st.error(f"Error generating GPT analysis: {e}")
         return None
 
 
-def create_pdf(input_data):
+def time_liberation_report(input_data):
     """
-    Create a PDF report from the analyzed data and GPT recommendations.
+    Build the report dict from the analyzed data and GPT recommendations.
     """
     # Process data
     task_matrix, observations = analyze_tasks(input_data)
     gpt_analysis = generate_gpt_analysis(task_matrix, observations)
-    temp_pdf = tempfile.mktemp(".pdf")
-    doc = SimpleDocTemplate(temp_pdf, pagesize=letter)
-
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle('TitleStyle', parent=styles['Title'], alignment=1)
-    heading_style = styles['Heading2']
-    normal_style = styles['Normal']
-
-    # Build story (content)
-    story = []
-
-    # Title
-    story.append(Paragraph("Time Liberation Matrix Report", title_style))
-    story.append(Spacer(1, 12))
+    # Build the report sections
+    sections = [{"type": "title", "text": "Time Liberation Matrix Report"}]
 
     # Task Prioritization Matrix
-    story.append(Paragraph("Task Prioritization Matrix:", heading_style))
-    table_data = [["Task", "Time Spent", "Urgency", "Impact", "Recommendation"]]
-    for task in task_matrix:
-        table_data.append([task["task"], task["time_spent"], task["urgency"], task["impact"], task["recommendation"]])
-    
-    table = Table(table_data, colWidths=[150, 70, 100, 100, 120])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#D3D3D3')),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
-    ]))
-    story.append(table)
-    story.append(Spacer(1, 12))
+    sections += [
+        {"type": "heading", "text": "Task Prioritization Matrix:"},
+        {
+            "type": "table",
+            "header": ["Task", "Time Spent", "Urgency", "Impact", "Recommendation"],
+            "rows": [[task["task"], task["time_spent"], task["urgency"], task["impact"], task["recommendation"]] for task in task_matrix],
+            "col_widths": [150, 70, 100, 100, 120],
+            "wrap_columns": [0],
+            # Built from the task inputs only, so it is reused while they are unchanged
+            "cache": True,
+        },
+        {"type": "spacer"},
+    ]
     try:
         # Observations
-        story.append(Paragraph("Observations:", heading_style))
+        sections.append({"type": "heading", "text": "Observations:"})
         for key, value in observations.items():
             if isinstance(value, list):
-                story.append(Paragraph(f"{key.replace('_', ' ').capitalize()}:", normal_style))
-                for item in value:
-                    story.append(Paragraph(f"• {item}", normal_style))
+                sections.append({"type": "paragraph", "text": f"{key.replace('_', ' ').capitalize()}:"})
+                sections.append({"type": "bullets", "items": value})
             else:
-                story.append(Paragraph(value, normal_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
-    try:
-        # Recommendations
-        story.append(Paragraph("Recommendations:", heading_style))
-        if gpt_analysis:
-            try:
-                for rec in gpt_analysis.get("recommendations", []):
-                    story.append(Paragraph(f"• {rec}", normal_style))
-                story.append(Spacer(1, 12))
-            except:
-                pass
-            try:
-                # Focus Areas
-                story.append(Paragraph("Focus Areas:", heading_style))
-                for area in gpt_analysis.get("focus_areas", []):
-                    story.append(Paragraph(f"• {area}", normal_style))
-                story.append(Spacer(1, 12))
-            except:
-                pass
-            try:
-                # Delegate Tasks
-                story.append(Paragraph("Tasks to Delegate:", heading_style))
-                for task in gpt_analysis.get("delegate_tasks", []):
-                    story.append(Paragraph(f"• {task}", normal_style))
-                story.append(Spacer(1, 12))
-            except:
-                pass
+                sections.append({"type": "paragraph", "text": value})
+        sections.append({"type": "spacer"})
     except:
         pass
+    # Recommendations
+    sections.append({"type": "heading", "text": "Recommendations:"})
+    if gpt_analysis:
+        sections += [
+            {"type": "bullets", "items": gpt_analysis.get("recommendations", [])},
+            {"type": "spacer"},
+            # Focus Areas
+            {"type": "heading", "text": "Focus Areas:"},
+            {"type": "bullets", "items": gpt_analysis.get("focus_areas", [])},
+            {"type": "spacer"},
+            # Delegate Tasks
+            {"type": "heading", "text": "Tasks to Delegate:"},
+            {"type": "bullets", "items": gpt_analysis.get("delegate_tasks", [])},
+            {"type": "spacer"},
+        ]
+
+    return {
+        "sections": sections,
+        "report_type": "time_liberation",
+        "payload": {"task_matrix": task_matrix, "observations": observations, "analysis": gpt_analysis},
+    }
+
 
-    # Build the PDF
-    doc.build(story)
-    return temp_pdf
+def create_pdf(input_data):
+    """
+    Create a PDF report from the analyzed data and GPT recommendations and return its bytes.
+    """
+    return render_service.render_report(time_liberation_report(input_data))
 
 if __name__ == "__main__":
     input_data = {
@@ -217,5 +193,7 @@ if __name__ == "__main__":
     ]
 }
 
-    pdf_path = create_pdf(input_data)
+    pdf_path = "TimeLiberationMatrixReport.pdf"
+    with open(pdf_path, "wb") as f:
+        f.write(create_pdf(input_data))
     print(f"PDF Report generated at: {pdf_path}")
@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 import json
-from gpt4_backend import create_pl_pdf
+from gpt4_backend import pl_report
+from report_output import lazy_pdf, show_report
 
 def calculate_financials(revenue, cogs, overhead):
     """
@@ -72,16 +73,17 @@ def main():
     # Generate Report Button
     if st.button("Generate Results"):
         survey_data = output_json
-        # Call the create_pdf function
+        # Show the report straight away; the PDF is rendered only when downloaded
         try:
-            pdf_path = create_pl_pdf(survey_data)
-            with open(pdf_path, "rb") as pdf_file:
-                st.download_button(
-                    label="Download Report",
-                    data=pdf_file,
-                    file_name="ProfitAndLoss.pdf",
-                    mime="application/pdf"
-                )
+            report = pl_report(survey_data)
+            show_report(report)
+            st.download_button(
+                label="Download Report",
+                data=lazy_pdf(report),
+                file_name="ProfitAndLoss.pdf",
+                mime="application/pdf",
+                on_click="ignore"
+            )
         except Exception as e:
             st.error(f"Failed to generate reports: {e}")
 
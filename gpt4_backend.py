@@ -1,15 +1,10 @@
 import json
-import tempfile
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from openai import OpenAI
-import streamlit as st
+from render_service import render_service
+from openai_client import get_client
+from llm_cache import cached_completion
 
 # Set up OpenAI API
-api_key = st.secrets["OPENAI_API_KEY"]
-client = OpenAI(api_key=api_key)
+client = get_client()
 
 
 def calculate_pl_metrics(input_data):
@@ -116,163 +111,99 @@ def generate_gpt_pl_analysis(input_data, metrics):
     PS: PS: STRICTLY adhere to the output format
     """
     try:
-        response = client.chat.completions.create(
+        content = cached_completion(
+            client,
             model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": json.dumps({"input_data": input_data, "metrics": metrics})}
-            ],
+            system_prompt=system_prompt,
+            user_payload={"input_data": input_data, "metrics": metrics},
             response_format={"type": "json_object"}
         )
-        return json.loads(response.choices[0].message.content)
+        return json.loads(content)
     except:
         return None
 
-def create_pl_pdf(input_data):
+def pl_report(input_data):
     """
-    Create a PDF report for P&L analysis.
+    Build the report dict for P&L analysis.
     """
     metrics = calculate_pl_metrics(input_data)
     gpt_analysis = generate_gpt_pl_analysis(input_data, metrics)
-    temp_pdf = tempfile.mktemp(".pdf")
-    doc = SimpleDocTemplate(temp_pdf, pagesize=letter)
-
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle('TitleStyle', parent=styles['Title'], alignment=1)
-    heading_style = styles['Heading2']
-    normal_style = styles['Normal']
-    bullet_style = ParagraphStyle('BulletStyle', parent=normal_style)
-    # Build story (content)
-    story = []
-
-    # Title
-    try:
-        story.append(Paragraph("Profit and Loss Power Insight Report", title_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
+    # Build the report sections
+    sections = [{"type": "title", "text": "Profit and Loss Power Insight Report"}]
 
     # P&L Table
-    try:
-        story.append(Paragraph("Profit and Loss Metrics Table:", heading_style))
-        
-        # Define wrap style for table content
-        wrap_style = styles['Normal']
-        wrap_style.fontSize = 8  # Set font size for better readability
-        wrap_style.leading = 10  # Adjust line spacing
-
-        # Create the table header
-        table_data = [
-            [
-                Paragraph("Year", wrap_style),
-                Paragraph("Revenue ($M)", wrap_style),
-                Paragraph("COGS (%)", wrap_style),
-                Paragraph("Gross Profit ($M)", wrap_style),
-                Paragraph("Overhead (SG&A %)", wrap_style),
-                Paragraph("Net Profit ($M)", wrap_style),
-                Paragraph("Break Even Point ($M)", wrap_style),
-            ]
-        ]
-
-        # Add rows for each metric
-        for metric in metrics:
-            try:
-                table_data.append([
-                    Paragraph(metric.get("Year", "N/A"), wrap_style),
-                    Paragraph(f"${metric.get('Revenue', 0):.2f}", wrap_style),
-                    Paragraph(f"{metric.get('COGS (%)', 0)}%", wrap_style),
-                    Paragraph(f"${metric.get('Gross Profit', 0):.2f}", wrap_style),
-                    Paragraph(f"{metric.get('Overhead (SG&A %)', 0)}%", wrap_style),
-                    Paragraph(f"${metric.get('Net Profit', 0):.2f}", wrap_style),
-                    Paragraph(f"${metric.get('Break Even Point', 0):.2f}", wrap_style),
-                ])
-            except:
-                pass
-
-        # Create the table
-        table = Table(table_data, colWidths=[60, 80, 60, 100, 80, 80, 80])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#D3D3D3')),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
-        ]))
-
-        # Add the table to the story
-        story.append(table)
-        story.append(Spacer(1, 12))
-    except:
-        pass
-
-    try:
-        # Trends
-        trends = gpt_analysis.get('key_trends', {})
-        story.append(Paragraph("Key Finalcial Trends:", heading_style))
-        story.append(Paragraph("<b>Revenue Growth:</b>", normal_style))
-        try:
-            for issue in trends.get('RevenueGrowth', []):
-                story.append(Paragraph(f"• {issue}", bullet_style))
-        except:
-            pass
-        
-        try:
-            story.append(Paragraph("<b>Cost Growth:</b>", normal_style))
-            for issue in trends.get('CostGrowth', []):
-                story.append(Paragraph(f"• {issue}", bullet_style))
-        except:
-            pass    
-        
+    rows = []
+    for metric in metrics:
         try:
-            story.append(Paragraph("<b>Profit Margin:</b>", normal_style))
-            for strength in trends.get('ProfitMargin', []):
-                story.append(Paragraph(f"• {strength}", bullet_style))
+            rows.append([
+                str(metric.get("Year", "N/A")),
+                f"${metric.get('Revenue', 0):.2f}",
+                f"{metric.get('COGS (%)', 0)}%",
+                f"${metric.get('Gross Profit', 0):.2f}",
+                f"{metric.get('Overhead (SG&A %)', 0)}%",
+                f"${metric.get('Net Profit', 0):.2f}",
+                f"${metric.get('Break Even Point', 0):.2f}",
+            ])
         except:
             pass
-        try:
-            story.append(Paragraph("<b>Break Even Point:</b>", normal_style))
-            for strength in trends.get('BreakEvenPoint', []):
-                story.append(Paragraph(f"• {strength}", bullet_style))
-        except:
-            pass
-        story.append(Spacer(1, 12))
-    except:
-        pass
-    # Observations
-    try:
-        story.append(Paragraph("Observations:", heading_style))
-        for obs in gpt_analysis.get("observations", []):
-            story.append(Paragraph(f"• {obs}", normal_style))
-        story.append(Spacer(1, 12))
-    except:
-        pass
+    sections += [
+        {"type": "heading", "text": "Profit and Loss Metrics Table:"},
+        {
+            "type": "table",
+            "header": ["Year", "Revenue ($M)", "COGS (%)", "Gross Profit ($M)", "Overhead (SG&amp;A %)", "Net Profit ($M)", "Break Even Point ($M)"],
+            "rows": rows,
+            "col_widths": [60, 80, 60, 100, 80, 80, 80],
+            # Built from the P&L inputs only, so it is reused while they are unchanged
+            "cache": True,
+        },
+        {"type": "spacer"},
+    ]
 
-    # Recommendations
     try:
-        story.append(Paragraph("Recommendations:", heading_style))
-        for rec in gpt_analysis.get("recommendations", []):
-            story.append(Paragraph(f"• {rec}", normal_style))
-        story.append(Spacer(1, 12))
+        # Trends
+        trends = gpt_analysis.get('key_trends', {})
+        sections += [
+            {"type": "heading", "text": "Key Finalcial Trends:"},
+            {"type": "paragraph", "text": "<b>Revenue Growth:</b>"},
+            {"type": "bullets", "items": trends.get('RevenueGrowth', []), "style": "bullet"},
+            {"type": "paragraph", "text": "<b>Cost Growth:</b>"},
+            {"type": "bullets", "items": trends.get('CostGrowth', []), "style": "bullet"},
+            {"type": "paragraph", "text": "<b>Profit Margin:</b>"},
+            {"type": "bullets", "items": trends.get('ProfitMargin', []), "style": "bullet"},
+            {"type": "paragraph", "text": "<b>Break Even Point:</b>"},
+            {"type": "bullets", "items": trends.get('BreakEvenPoint', []), "style": "bullet"},
+            {"type": "spacer"},
+        ]
     except:
         pass
 
-    # Next Steps
     try:
-        story.append(Paragraph("Next Steps:", heading_style))
-        for step in gpt_analysis.get("next_steps", []):
-            story.append(Paragraph(f"• {step}", normal_style))
-        story.append(Spacer(1, 12))
+        sections += [
+            # Observations
+            {"type": "heading", "text": "Observations:"},
+            {"type": "bullets", "items": gpt_analysis.get("observations", [])},
+            {"type": "spacer"},
+            # Recommendations
+            {"type": "heading", "text": "Recommendations:"},
+            {"type": "bullets", "items": gpt_analysis.get("recommendations", [])},
+            {"type": "spacer"},
+            # Next Steps
+            {"type": "heading", "text": "Next Steps:"},
+            {"type": "bullets", "items": gpt_analysis.get("next_steps", [])},
+            {"type": "spacer"},
+        ]
     except:
         pass
 
-    # Build the PDF
-    try:
-        doc.build(story)
-    except:
-        pass
+    # Sections that fail to render are skipped by the renderer
+    return {"sections": sections, "report_type": "profit_and_loss", "payload": {"metrics": metrics, "analysis": gpt_analysis}}
+
 
-    return temp_pdf
+def create_pl_pdf(input_data):
+    """
+    Create a PDF report for P&L analysis and return its bytes.
+    """
+    return render_service.render_report(pl_report(input_data))
 
 
 if __name__ == "__main__":
@@ -307,5 +238,7 @@ if __name__ == "__main__":
     ]
 }
     # Generate PDF
-    pdf_path = create_pl_pdf(input_data)
+    pdf_path = "ProfitAndLoss.pdf"
+    with open(pdf_path, "wb") as f:
+        f.write(create_pl_pdf(input_data))
     print(f"PDF Report generated at: {pdf_path}")
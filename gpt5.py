@@ -1,25 +1,31 @@
 import streamlit as st
 import json
-import pymupdf
-from gpt5_backend import create_report
-def ocr_pdf(pdf_path):
-    doc = pymupdf.open(pdf_path)
-    
-    # Extract text from each page
-    pages_text = []
-    for page_num, page in enumerate(doc, 1):
-        text = page.get_text()
-        pages_text.append({
-            "page_number": page_num,
-            "text": text
-        })
-    
-    # Create JSON output
-    output = {
-        "pages": pages_text
-    }
-    
-    return output
+import hashlib
+import time
+from gpt5_backend import mandate_report, send_to_gpt
+from extraction_store import stored_extraction
+from pdf_extraction import pdf_buffer
+from prompt_compaction import REPORT_TOKEN_BUDGET
+from report_output import lazy_pdf, show_report
+
+# Extracted documents kept in memory, shared by every session of this server
+EXTRACTION_CACHE_ENTRIES = 64
+
+@st.cache_data(max_entries=EXTRACTION_CACHE_ENTRIES, show_spinner=False)
+def _extract_pdf(digest, token_budget, _pdf_buffer):
+    """
+    Extract a PDF, memoized on the SHA-256 digest of its bytes and the token budget (the bytes themselves are not hashed again).
+    Behind this in-memory memo, the extraction store keeps results across sessions, processes and restarts.
+    """
+    return stored_extraction(_pdf_buffer, digest, token_budget)
+def ocr_pdf(pdf_source, token_budget=REPORT_TOKEN_BUDGET):
+    """
+    Extract an uploaded or on-disk PDF, reusing earlier work for identical bytes.
+    Uploads are read straight from their in-memory buffer; pass token_budget=None to extract every page.
+    """
+    with pdf_buffer(pdf_source) as buffer:
+        digest = hashlib.sha256(buffer).hexdigest()
+        return _extract_pdf(digest, token_budget, buffer)
 def main():
     st.set_page_config(page_title="CEO Mandate Generator", page_icon="📑")
 
@@ -46,63 +52,37 @@ def main():
         "Upload Profit and Loss Insight (PDF)", type="PDF", key="pnl_power"
     )
 
-    # Parse and store uploaded files
-    outputs = {}
-    if strategic_priorities_file:
-        outputs["Strategic Priorities"] = ocr_pdf(strategic_priorities_file)
-    else:
-        outputs["Strategic Priorities"] = ocr_pdf(default_paths["strategic_priorities"])
-    if trust_barometer_file:
-        outputs["Leadership Trust Barometer"] = ocr_pdf(trust_barometer_file)
-    else:
-        outputs["Leadership Trust Barometer"] = ocr_pdf(default_paths["trust_barometer"])
-    if time_liberation_file:
-        outputs["Time Liberation Matrix"] = ocr_pdf(time_liberation_file)
-    else:
-        outputs["Time Liberation Matrix"] = ocr_pdf(default_paths["time_liberation"])
-
-    if pnl_power_file:
-        outputs["P&L Power Insight"] = ocr_pdf(pnl_power_file)
-    else:
-        outputs["P&L Power Insight"] = ocr_pdf(default_paths["pnl_power"])
+    # Uploaded files take precedence over the bundled defaults
+    pdf_sources = {
+        "Strategic Priorities": strategic_priorities_file or default_paths["strategic_priorities"],
+        "Leadership Trust Barometer": trust_barometer_file or default_paths["trust_barometer"],
+        "Time Liberation Matrix": time_liberation_file or default_paths["time_liberation"],
+        "P&L Power Insight": pnl_power_file or default_paths["pnl_power"],
+    }
     # Display consolidated insights
     if st.button("Generate CEO Mandate"):
+        # Extract only when the mandate is requested, not on every rerun
+        outputs, timings = {}, {}
+        for name, pdf_source in pdf_sources.items():
+            start = time.perf_counter()
+            outputs[name] = ocr_pdf(pdf_source)
+            timings[name] = time.perf_counter() - start
+        st.caption(" | ".join(f"{name}: {seconds:.2f}s" for name, seconds in timings.items()))
         survey_data = outputs
-        max_retries = 5
-        attempt = 0
-        success = False
-        pdf_path = None
-        
-        while attempt < max_retries and not success:
-            try:
-                attempt += 1
-                pdf_path = create_report(survey_data)
-                success = True
-            except Exception as e:
-                if attempt < max_retries:
-                    st.warning(f"Retrying...")
-                else:
-                    st.error(f"Failed to generate report after {max_retries} attempts: {e}")
-        
-        if success and pdf_path:
-            with open(pdf_path, "rb") as pdf_file:
-                st.download_button(
-                    label="Download Report",
-                    data=pdf_file,
-                    file_name="CEOMandate.pdf",
-                    mime="application/pdf"
-                )
-        # try:
-        #     pdf_path = create_report(survey_data)
-        #     with open(pdf_path, "rb") as pdf_file:
-        #         st.download_button(
-        #             label="Download Report",
-        #             data=pdf_file,
-        #             file_name="CEOMandate.pdf",
-        #             mime="application/pdf"
-        #         )
-        # except Exception as e:
-        #     st.error(f"Failed to generate reports: {e}")
+        # Schema repair and targeted re-requests happen in the backend; one call is enough here
+        # Show the mandate straight away; the PDF is rendered only when downloaded
+        try:
+            report = mandate_report(send_to_gpt(survey_data))
+            show_report(report)
+            st.download_button(
+                label="Download Report",
+                data=lazy_pdf(report),
+                file_name="CEOMandate.pdf",
+                mime="application/pdf",
+                on_click="ignore"
+            )
+        except Exception as e:
+            st.error(f"Failed to generate reports: {e}")
     else:
         st.warning("Please upload outputs from the required PDFs to generate the CEO Mandate.")
 
@@ -1,21 +1,14 @@
 import json
-import tempfile
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from openai import OpenAI
-import streamlit as st
+from render_service import render_service
+from openai_client import get_client
+from llm_cache import cached_completion, response_cache
+from prompt_compaction import REPORT_TOKEN_BUDGET, compact_report
+from json_repair import coerce_to_schema, drop_invalid_sections, invalid_sections, loads_lenient, regenerate_sections
 
 # Set up OpenAI API
-api_key = st.secrets["OPENAI_API_KEY"]
-client = OpenAI(api_key=api_key)
+client = get_client()
 
-
-def send_to_gpt(input_data):
-    """
-    Send the consolidated JSON data to GPT and get the analysis.
-    """
-    system_prompt = """
+MANDATE_SYSTEM_PROMPT = """
     You are a strategic insights expert. Integrate the inputs into a CEO mandate document
     outlining strategic priorities, focus areas, and a delegation plan.
     a) Customize the response STRICTLY from the input provided.
@@ -34,75 +27,112 @@ def send_to_gpt(input_data):
     
     PS: STRICTLY adhere to the output JSON format
     """
+
+# Expected shape of the mandate JSON, used to validate and repair GPT output
+MANDATE_SCHEMA = {
+    "strategic_priorities": list,
+    "non_negotiables": list,
+    "delegation_focus": {
+        "delegate": list,
+        "retain": list,
+    },
+    "next_steps": list,
+}
+
+
+def send_to_gpt(input_data, token_budget=REPORT_TOKEN_BUDGET):
+    """
+    Send the consolidated JSON data to GPT and get the analysis.
+    Each source report is compacted to at most token_budget tokens first.
+    Output is validated against MANDATE_SCHEMA: near misses are repaired locally and
+    only the sections still missing or invalid are requested again. Sections that stay
+    invalid are dropped, and the repaired mandate is cached in place of the raw response.
+    """
     try:
-        response = client.chat.completions.create(
+        sources = {"Strategic Priorities": input_data['Strategic Priorities'], "Leadership Trust Barometer": input_data['Leadership Trust Barometer'], 'Time Liberation Matrix': input_data['Time Liberation Matrix'], 'Profit and Loss': input_data['P&L Power Insight']}
+        user_payload = {name: compact_report(report, token_budget, name)[0] for name, report in sources.items()}
+        content = cached_completion(
+            client,
             model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": json.dumps({"Strategic Priorities": input_data['Strategic Priorities'], "Leadership Trust Barometer": input_data['Leadership Trust Barometer'], 'Time Liberation Matrix': input_data['Time Liberation Matrix'], 'Profit and Loss': input_data['P&L Power Insight']})}
-            ]
+            system_prompt=MANDATE_SYSTEM_PROMPT,
+            user_payload=user_payload,
+            response_format={"type": "json_object"},
+            validate=lambda c: not invalid_sections(coerce_to_schema(loads_lenient(c), MANDATE_SCHEMA), MANDATE_SCHEMA)
         )
-        return json.loads(response.choices[0].message.content)
     except Exception as e:
         raise RuntimeError(f"Error communicating with GPT: {e}")
 
-
-def generate_ceo_mandate(gpt_response):
+    mandate = coerce_to_schema(loads_lenient(content), MANDATE_SCHEMA)
+    invalid = invalid_sections(mandate, MANDATE_SCHEMA)
+    if invalid:
+        print(f"Mandate sections missing or invalid, re-requesting: {invalid}")
+        mandate.update(regenerate_sections(client, MANDATE_SYSTEM_PROMPT, user_payload, invalid, MANDATE_SCHEMA))
+        invalid = invalid_sections(mandate, MANDATE_SCHEMA)
+        if len(invalid) == len(MANDATE_SCHEMA):
+            raise RuntimeError("GPT did not return a usable CEO mandate.")
+        if invalid:
+            print(f"Mandate sections still unavailable after repair: {invalid}")
+        # mandate_report expects each section in its schema type
+        mandate = drop_invalid_sections(mandate, MANDATE_SCHEMA)
+        # A repeat request then gets the repaired mandate without regenerating it again
+        key = response_cache.make_key("gpt-4o-mini", MANDATE_SYSTEM_PROMPT, user_payload, {"type": "json_object"})
+        response_cache.set(key, json.dumps(mandate))
+    return mandate
+
+
+def mandate_report(gpt_response):
     """
-    Generate the CEO Mandate PDF document from the GPT response.
+    Build the CEO Mandate report dict from the GPT response.
     """
-    temp_pdf = tempfile.mktemp(".pdf")
-    doc = SimpleDocTemplate(temp_pdf, pagesize=letter)
-    styles = getSampleStyleSheet()
-    title_style = styles['Title']
-    heading_style = styles['Heading2']
-    normal_style = styles['Normal']
-
-    story = []
-
-    # Title
-    story.append(Paragraph("CEO Mandate", title_style))
-    story.append(Spacer(1, 12))
+    sections = [{"type": "title", "text": "CEO Mandate"}]
 
     # Strategic Priorities
     priorities = gpt_response.get("strategic_priorities", [])
     if priorities:
-        story.append(Paragraph("Strategic Priorities:", heading_style))
-        for priority in priorities:
-            story.append(Paragraph(f"• {priority}", normal_style))
-        story.append(Spacer(1, 12))
+        sections += [
+            {"type": "heading", "text": "Strategic Priorities:"},
+            {"type": "bullets", "items": priorities},
+            {"type": "spacer"},
+        ]
 
     # Non-Negotiables
     non_negotiables = gpt_response.get("non_negotiables", [])
     if non_negotiables:
-        story.append(Paragraph("Non-Negotiables:", heading_style))
-        for item in non_negotiables:
-            story.append(Paragraph(f"• {item}", normal_style))
-        story.append(Spacer(1, 12))
+        sections += [
+            {"type": "heading", "text": "Non-Negotiables:"},
+            {"type": "bullets", "items": non_negotiables},
+            {"type": "spacer"},
+        ]
 
     # Delegation Focus
     delegation = gpt_response.get("delegation_focus", {})
     if delegation:
-        story.append(Paragraph("Delegation Focus:", heading_style))
-        story.append(Paragraph("Tasks to Delegate:", normal_style))
-        for task in delegation.get("delegate", []):
-            story.append(Paragraph(f"• {task}", normal_style))
-        story.append(Paragraph("Tasks to Retain:", normal_style))
-        for task in delegation.get("retain", []):
-            story.append(Paragraph(f"• {task}", normal_style))
-        story.append(Spacer(1, 12))
+        sections += [
+            {"type": "heading", "text": "Delegation Focus:"},
+            {"type": "paragraph", "text": "Tasks to Delegate:"},
+            {"type": "bullets", "items": delegation.get("delegate", [])},
+            {"type": "paragraph", "text": "Tasks to Retain:"},
+            {"type": "bullets", "items": delegation.get("retain", [])},
+            {"type": "spacer"},
+        ]
 
     # Next Steps
     next_steps = gpt_response.get("next_steps", [])
     if next_steps:
-        story.append(Paragraph("Next Steps:", heading_style))
-        for step in next_steps:
-            story.append(Paragraph(f"• {step}", normal_style))
-        story.append(Spacer(1, 12))
+        sections += [
+            {"type": "heading", "text": "Next Steps:"},
+            {"type": "bullets", "items": next_steps},
+            {"type": "spacer"},
+        ]
+
+    return {"sections": sections}
 
-    # Build the PDF
-    doc.build(story)
-    return temp_pdf
+
+def generate_ceo_mandate(gpt_response):
+    """
+    Generate the CEO Mandate PDF document from the GPT response and return its bytes.
+    """
+    return render_service.render_report(mandate_report(gpt_response))
 
 
 def create_report(input_data):
@@ -114,9 +144,7 @@ def create_report(input_data):
         gpt_response = send_to_gpt(input_data)
 
         # Generate PDF document using GPT response
-        pdf_path = generate_ceo_mandate(gpt_response)
-
-        return pdf_path
+        return generate_ceo_mandate(gpt_response)
     except Exception as e:
         raise RuntimeError(f"Failed to create report: {e}")
 
@@ -129,6 +157,8 @@ if __name__ == "__main__":
     try:
         # Call create_report to generate the mandate
         pdf_report = create_report(input_data)
-        print(f"CEO Mandate generated at: {pdf_report}")
+        with open("CEOMandate.pdf", "wb") as f:
+            f.write(pdf_report)
+        print("CEO Mandate generated at: CEOMandate.pdf")
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,172 @@
+import json
+import random
+import re
+import time
+
+from llm_cache import cached_completion
+
+_FENCE_RE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+_DANGLING_KEY_RE = re.compile(r',\s*"[^"]*"\s*:?\s*$')
+
+# Backoff between targeted re-requests: base * 2**attempt, fully jittered
+REPAIR_ATTEMPTS = 3
+REPAIR_BASE_DELAY_SECONDS = 1.0
+
+
+def strip_code_fences(text):
+    """
+    Remove a surrounding ```json ... ``` markdown fence.
+    """
+    return _FENCE_RE.sub("", text).strip()
+
+
+def close_truncated_json(text):
+    """
+    Close the strings, arrays and objects left open by a truncated generation.
+    """
+    stack = []
+    in_string = False
+    escape = False
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+
+    if in_string:
+        text += '"'
+    text = text.rstrip()
+    # Inside an object, a key or "key": cut off before its value cannot be kept
+    if stack and stack[-1] == "}":
+        text = _DANGLING_KEY_RE.sub("", text)
+    text = text.rstrip().rstrip(",")
+    return text + "".join(reversed(stack))
+
+
+def loads_lenient(text):
+    """
+    Parse model output as a JSON object, repairing near misses locally.
+
+    Tries the raw text, then without markdown fences, then only the outermost {...},
+    then with truncated structures closed. Returns None if nothing parses to a dict.
+    """
+    if not isinstance(text, str):
+        return text if isinstance(text, dict) else None
+    stripped = strip_code_fences(text)
+    start = stripped.find("{")
+    end = stripped.rfind("}")
+    candidates = [text, stripped]
+    if start != -1:
+        candidates.append(stripped[start:end + 1] if end > start else stripped[start:])
+        candidates.append(close_truncated_json(stripped[start:]))
+    for candidate in candidates:
+        try:
+            parsed = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(parsed, dict):
+            return parsed
+    return None
+
+
+def coerce_to_schema(data, schema):
+    """
+    Fix shape near misses: a lone string where a list is expected becomes a one-item list.
+    """
+    data = dict(data or {})
+    for key, expected in schema.items():
+        value = data.get(key)
+        if isinstance(expected, dict):
+            if isinstance(value, dict):
+                data[key] = coerce_to_schema(value, expected)
+        elif expected is list and isinstance(value, str) and value.strip():
+            data[key] = [value]
+    return data
+
+
+def invalid_sections(data, schema):
+    """
+    Return the top-level schema keys that are missing, empty or of the wrong type.
+
+    Schema values are list, str or a nested schema dict. A nested section is invalid
+    if any of its own keys is.
+    """
+    if not isinstance(data, dict):
+        return list(schema)
+    invalid = []
+    for key, expected in schema.items():
+        value = data.get(key)
+        if isinstance(expected, dict):
+            if invalid_sections(value, expected):
+                invalid.append(key)
+        elif not isinstance(value, expected) or not value:
+            invalid.append(key)
+    return invalid
+
+
+def drop_invalid_sections(data, schema):
+    """
+    Remove the schema keys that are missing, empty or of the wrong type, so callers
+    only ever see well-typed sections. A nested section keeps its valid keys.
+    """
+    data = dict(data or {})
+    for key, expected in schema.items():
+        value = data.get(key)
+        if isinstance(expected, dict) and isinstance(value, dict):
+            value = drop_invalid_sections(value, expected)
+            if value:
+                data[key] = value
+                continue
+        elif not isinstance(expected, dict) and isinstance(value, expected) and value:
+            continue
+        data.pop(key, None)
+    return data
+
+
+def regenerate_sections(client, system_prompt, user_payload, sections, schema, attempts=REPAIR_ATTEMPTS, base_delay=REPAIR_BASE_DELAY_SECONDS):
+    """
+    Ask GPT again for only the given sections, with jittered exponential backoff.
+
+    Returns a dict holding whichever of the sections came back valid.
+    """
+    repaired = {}
+    remaining = list(sections)
+    section_schema = {key: schema[key] for key in sections}
+    for attempt in range(attempts):
+        if attempt:
+            time.sleep(random.uniform(0, base_delay * 2 ** attempt))
+        prompt = (
+            f"{system_prompt}\n"
+            f"Return a JSON object containing ONLY these keys, in the format above: {', '.join(remaining)}"
+        )
+        wanted = {key: section_schema[key] for key in remaining}
+        try:
+            content = cached_completion(
+                client,
+                model="gpt-4o-mini",
+                system_prompt=prompt,
+                user_payload=user_payload,
+                response_format={"type": "json_object"},
+                validate=lambda c: not invalid_sections(coerce_to_schema(loads_lenient(c), wanted), wanted),
+            )
+        except Exception as e:
+            print(f"Error regenerating sections {remaining}: {e}")
+            continue
+        candidate = coerce_to_schema(loads_lenient(content), wanted)
+        still_invalid = invalid_sections(candidate, wanted)
+        for key in remaining:
+            if key not in still_invalid:
+                repaired[key] = candidate[key]
+        remaining = still_invalid
+        if not remaining:
+            break
+    return repaired
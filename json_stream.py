@@ -0,0 +1,62 @@
+import json
+
+
+class TopLevelObjectParser:
+    """
+    Incrementally parse a streamed JSON object.
+
+    Chunks are fed in as they arrive and every top-level member is returned as a
+    (key, value) pair as soon as its value is complete, so callers can act on the
+    first sections of a report while the rest is still being generated.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+
+    def feed(self, chunk):
+        """
+        Consume a chunk of text and return the (key, value) pairs it completed.
+        """
+        self.text += chunk
+        completed = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._member_start is None:
+                    self._member_start = i
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 1:
+                    self._close_member(i, completed)
+                self._depth -= 1
+            elif ch == "," and self._depth == 1:
+                self._close_member(i, completed)
+        self._pos = len(text)
+        return completed
+
+    def _close_member(self, end, completed):
+        if self._member_start is None:
+            return
+        member = self.text[self._member_start:end]
+        self._member_start = None
+        try:
+            parsed = json.loads("{" + member + "}")
+        except ValueError as e:
+            print(f"Skipping unparsable streamed member: {e}")
+            return
+        completed.extend(parsed.items())
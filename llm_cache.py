@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from openai_client import async_request_slot, request_slot
+
+# Cache location and limits, overridable from the environment
+CACHE_DIR = os.environ.get("LLM_CACHE_DIR", ".llm_cache")
+CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache for chat completion responses.
+
+    Each entry is one JSON file named after the SHA-256 of the request. File mtimes
+    track last use, so eviction drops expired entries first and then the least
+    recently used ones until the directory fits in max_bytes.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, ttl_seconds=CACHE_TTL_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model, system_prompt, user_payload, response_format=None):
+        """
+        Hash the model, system prompt, canonicalized user payload and response_format.
+        """
+        canonical = json.dumps(
+            {
+                "model": model,
+                "system_prompt": system_prompt,
+                "user_payload": user_payload,
+                "response_format": response_format,
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """
+        Return the cached content for key, or None on a miss or an expired entry.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if time.time() - entry.get("created", 0) > self.ttl_seconds:
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return entry.get("content")
+
+    def set(self, key, content):
+        """
+        Store content under key and evict old entries if the cache is over budget.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "content": content}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing LLM cache entry {key}: {e}")
+            self._remove(tmp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """
+        Drop entries unused for longer than the TTL, then least recently used ones over max_bytes.
+        """
+        try:
+            entries = []
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".json"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+
+        now = time.time()
+        total = 0
+        live = []
+        for mtime, size, path in entries:
+            # An entry untouched for a full TTL was necessarily created before it
+            if now - mtime > self.ttl_seconds:
+                self._remove(path, evicted=True)
+            else:
+                live.append((mtime, size, path))
+                total += size
+
+        live.sort()
+        for mtime, size, path in live:
+            if total <= self.max_bytes:
+                break
+            self._remove(path, evicted=True)
+            total -= size
+
+    def _remove(self, path, evicted=False):
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        if evicted:
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self):
+        """
+        Return hit/miss/eviction counters for this process.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache()
+
+
+def _is_json(content):
+    try:
+        json.loads(content)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _request_kwargs(model, system_prompt, user_payload, response_format):
+    kwargs = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": json.dumps(user_payload)}
+        ],
+    }
+    if response_format is not None:
+        kwargs["response_format"] = response_format
+    return kwargs
+
+
+def cached_completion(client, model, system_prompt, user_payload, response_format=None, cache=None, validate=_is_json):
+    """
+    Return the message content of a chat completion, serving repeat requests from the cache.
+
+    The user message is json.dumps(user_payload), as the backends always sent it.
+    Only responses accepted by validate (by default: parses as JSON) are stored, so a
+    malformed generation is never replayed to a caller that retries.
+    """
+    cache = response_cache if cache is None else cache
+    key = cache.make_key(model, system_prompt, user_payload, response_format)
+    content = cache.get(key)
+    if content is not None:
+        return content
+
+    with request_slot():
+        response = client.chat.completions.create(**_request_kwargs(model, system_prompt, user_payload, response_format))
+    content = response.choices[0].message.content
+    if validate(content):
+        cache.set(key, content)
+    return content
+
+
+async def acached_completion(client, model, system_prompt, user_payload, response_format=None, cache=None):
+    """
+    Async counterpart of cached_completion for an AsyncOpenAI client.
+    """
+    cache = response_cache if cache is None else cache
+    key = cache.make_key(model, system_prompt, user_payload, response_format)
+    content = cache.get(key)
+    if content is not None:
+        return content
+
+    async with async_request_slot():
+        response = await client.chat.completions.create(**_request_kwargs(model, system_prompt, user_payload, response_format))
+    content = response.choices[0].message.content
+    if _is_json(content):
+        cache.set(key, content)
+    return content
+
+
+def stream_completion(client, model, system_prompt, user_payload, response_format=None, cache=None):
+    """
+    Yield the message content of a chat completion chunk by chunk.
+
+    Shares cache entries with cached_completion: a hit is yielded as a single chunk,
+    a miss is streamed from the API and stored once complete.
+    """
+    cache = response_cache if cache is None else cache
+    key = cache.make_key(model, system_prompt, user_payload, response_format)
+    content = cache.get(key)
+    if content is not None:
+        yield content
+        return
+
+    parts = []
+    # The slot is held until the stream is drained, since the connection stays busy
+    with request_slot():
+        stream = client.chat.completions.create(
+            stream=True,
+            **_request_kwargs(model, system_prompt, user_payload, response_format)
+        )
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+    content = "".join(parts)
+    if _is_json(content):
+        cache.set(key, content)
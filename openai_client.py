@@ -0,0 +1,116 @@
+import asyncio
+import contextlib
+import os
+import threading
+import weakref
+
+import httpx
+import streamlit as st
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+# Connection pooling, timeouts and concurrency shared by every backend
+MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", 20))
+MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 10))
+KEEPALIVE_EXPIRY_SECONDS = float(os.environ.get("OPENAI_KEEPALIVE_EXPIRY_SECONDS", 120))
+REQUEST_TIMEOUT_SECONDS = float(os.environ.get("OPENAI_REQUEST_TIMEOUT_SECONDS", 120))
+CONNECT_TIMEOUT_SECONDS = float(os.environ.get("OPENAI_CONNECT_TIMEOUT_SECONDS", 10))
+MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", 2))
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("OPENAI_MAX_CONCURRENT_REQUESTS", 8))
+
+_clients = {}
+_clients_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+_request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+_async_request_slots = weakref.WeakKeyDictionary()
+
+
+def _resolve_api_key(secret_name):
+    """
+    Read the API key from Streamlit secrets, falling back to the OPENAI_API_KEY env var
+    so the backends also import outside `streamlit run` (CLI and worker processes).
+    """
+    try:
+        return st.secrets[secret_name]
+    except Exception:
+        return os.environ.get("OPENAI_API_KEY")
+
+
+def _timeout(timeout=None):
+    return httpx.Timeout(timeout or REQUEST_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS)
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def get_client(secret_name="OPENAI_API_KEY", timeout=None):
+    """
+    Return the process-wide OpenAI client for the given secret.
+
+    All callers share one keep-alive connection pool per API key. Passing timeout
+    returns a view of the same client with a different per-request timeout.
+    """
+    api_key = _resolve_api_key(secret_name)
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = OpenAI(
+                api_key=api_key,
+                timeout=_timeout(),
+                max_retries=MAX_RETRIES,
+                http_client=DefaultHttpxClient(limits=_limits(), timeout=_timeout()),
+            )
+            _clients[api_key] = client
+    if timeout is not None:
+        return client.with_options(timeout=_timeout(timeout))
+    return client
+
+
+def get_async_client(secret_name="OPENAI_API_KEY", timeout=None):
+    """
+    Return the AsyncOpenAI twin of get_client for the running event loop.
+
+    httpx async connections are bound to the loop that opened them, so one pooled
+    client is kept per loop. Must be called from inside a coroutine.
+    """
+    loop = asyncio.get_running_loop()
+    api_key = _resolve_api_key(secret_name)
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(api_key)
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=api_key,
+            timeout=_timeout(),
+            max_retries=MAX_RETRIES,
+            http_client=DefaultAsyncHttpxClient(limits=_limits(), timeout=_timeout()),
+        )
+        clients[api_key] = client
+    if timeout is not None:
+        return client.with_options(timeout=_timeout(timeout))
+    return client
+
+
+@contextlib.contextmanager
+def request_slot():
+    """
+    Hold one of the MAX_CONCURRENT_REQUESTS process-wide slots for an LLM call.
+    """
+    with _request_slots:
+        yield
+
+
+@contextlib.asynccontextmanager
+async def async_request_slot():
+    """
+    Async counterpart of request_slot, limiting in-flight calls on the running loop.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _async_request_slots.get(loop)
+    if semaphore is None:
+        semaphore = _async_request_slots[loop] = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    async with semaphore:
+        yield
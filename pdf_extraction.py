@@ -0,0 +1,319 @@
+import contextlib
+import functools
+import hashlib
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pymupdf
+
+from fragment_cache import FragmentCache
+from pdf_structure import page_lines
+
+# Worker processes for text extraction, and the smallest document worth splitting
+EXTRACT_WORKERS = int(os.environ.get("EXTRACT_WORKERS", min(4, os.cpu_count() or 1)))
+EXTRACT_PARALLEL_MIN_PAGES = int(os.environ.get("EXTRACT_PARALLEL_MIN_PAGES", 32))
+EXTRACT_MIN_CHUNK_PAGES = int(os.environ.get("EXTRACT_MIN_CHUNK_PAGES", 8))
+EXTRACT_TIMEOUT_SECONDS = float(os.environ.get("EXTRACT_TIMEOUT_SECONDS", 300))
+RECENT_DOCUMENTS = 100
+
+# Pages with fewer non-blank characters than this that draw an image are treated as scans
+OCR_MIN_TEXT_CHARS = int(os.environ.get("OCR_MIN_TEXT_CHARS", 16))
+OCR_LANGUAGE = os.environ.get("OCR_LANGUAGE", "eng")
+OCR_DPI = int(os.environ.get("OCR_DPI", 300))
+OCR_CACHE_ENTRIES = int(os.environ.get("OCR_CACHE_ENTRIES", 512))
+
+
+def extract_page(page, textpage=None):
+    """
+    Extract one page as {"page_number", "text", "lines"}, lines being
+    pdf_structure.page_lines output. Both are read from a single text page.
+    """
+    if textpage is None:
+        textpage = page.get_textpage(flags=pymupdf.TEXTFLAGS_TEXT)
+    return {"page_number": page.number + 1, "text": page.get_text(textpage=textpage),
+            "lines": page_lines(page, textpage)}
+
+
+def needs_ocr(page, text, min_chars=OCR_MIN_TEXT_CHARS):
+    """
+    True for a page with no real text layer that draws an image, i.e. a scanned page.
+    """
+    return len("".join(text.split())) < min_chars and bool(page.get_images())
+
+
+def page_hash(page):
+    """
+    SHA-256 of what a page draws: its rotation, content stream and raw image streams.
+
+    Identical scans hash alike whichever document or position they appear in.
+    """
+    digest = hashlib.sha256(f"{page.rotation}:{page.rect}".encode("ascii"))
+    digest.update(page.read_contents())
+    for xref, *_ in page.get_images():
+        digest.update(page.parent.xref_stream_raw(xref) or b"")
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def ocr_available():
+    """
+    True if Tesseract and its language data can be found for PyMuPDF's OCR.
+    """
+    try:
+        pymupdf.get_tessdata()
+        return True
+    except RuntimeError as e:
+        print(f"OCR unavailable: {e}")
+        return False
+
+
+@contextlib.contextmanager
+def pdf_buffer(source):
+    """
+    Yield the bytes of a PDF source for pymupdf.open(stream=...), copying nothing that
+    is already in memory.
+
+    An upload (Streamlit's UploadedFile, or any BytesIO) lends a memoryview of its own
+    buffer, released again on exit; bytes pass through as they are; a path is read once.
+    """
+    if hasattr(source, "getbuffer"):
+        view = source.getbuffer()
+        try:
+            yield view
+        finally:
+            view.release()
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        yield source
+    else:
+        with open(source, "rb") as f:
+            yield f.read()
+
+
+def ocr_page(page, language=OCR_LANGUAGE, dpi=OCR_DPI):
+    """
+    OCR one page and extract it as extract_page does, or return None if OCR fails.
+    """
+    try:
+        return extract_page(page, page.get_textpage_ocr(language=language, dpi=dpi, full=True))
+    except Exception as e:
+        print(f"Error running OCR on page {page.number + 1}: {e}")
+        return None
+
+
+def _extract_range(pdf_bytes, start, stop):
+    """
+    Open the document in this worker and extract pages [start, stop).
+
+    Returns (pages, numbers) where numbers are the 0-based pages that need OCR.
+    """
+    doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        pages, numbers = [], []
+        for number in range(start, stop):
+            page = doc[number]
+            extracted = extract_page(page)
+            if needs_ocr(page, extracted["text"]):
+                numbers.append(number)
+            pages.append(extracted)
+        return pages, numbers
+    finally:
+        doc.close()
+
+
+def _ocr_pages(pdf_bytes, numbers, language=OCR_LANGUAGE, dpi=OCR_DPI):
+    """
+    Open the document in this worker and OCR the given 0-based pages. Returns them as
+    extract_page does, in order; a page that fails to OCR comes back as None.
+    """
+    doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return [ocr_page(doc[number], language, dpi) for number in numbers]
+    finally:
+        doc.close()
+
+
+def page_ranges(page_count, workers, min_chunk=EXTRACT_MIN_CHUNK_PAGES):
+    """
+    Split page_count pages into contiguous [start, stop) ranges, about two per worker.
+
+    Two ranges per worker lets a worker that drew quick pages pick up more work, while
+    keeping the number of document copies sent to the pool small.
+    """
+    size = max(min_chunk, math.ceil(page_count / max(1, workers * 2)))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+class ExtractionService:
+    """
+    Extracts PDF text in a pool of worker processes, one page range per task, and OCRs
+    only the pages that have no text layer.
+
+    get_text is CPU-bound C code called from Python, so a long upload (a 100+ page board
+    pack) on the Streamlit thread holds up the session and uses one core. Each task
+    opens the document independently in its worker; results are merged back in page
+    order. Documents shorter than min_pages are extracted inline, where the pool's
+    start-up and transfer cost would outweigh the gain.
+
+    Scanned pages found on the way are OCRed in a second pass, spread over the pool
+    whatever the document's length, since OCR costs about a second a page. OCR text is
+    cached on the page's hash, so a scan seen before (the same statement uploaded again,
+    or inside another document) costs nothing the next time.
+    """
+
+    def __init__(self, workers=EXTRACT_WORKERS, min_pages=EXTRACT_PARALLEL_MIN_PAGES,
+                 language=OCR_LANGUAGE, dpi=OCR_DPI):
+        self.workers = workers
+        self.min_pages = min_pages
+        self.language = language
+        self.dpi = dpi
+        self.ocr_cache = FragmentCache(OCR_CACHE_ENTRIES)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=RECENT_DOCUMENTS)
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _reset_pool(self, pool):
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _map(self, function, pdf_bytes, tasks, inline, timeout):
+        """
+        Call function(pdf_bytes, *task) for each task, in the pool unless inline.
+        """
+        if inline:
+            return [function(pdf_bytes, *task) for task in tasks]
+        # A memoryview cannot be pickled; workers get one bytes copy (none if already bytes)
+        pdf_bytes = bytes(pdf_bytes)
+        pool = self._get_pool()
+        try:
+            futures = [pool.submit(function, pdf_bytes, *task) for task in tasks]
+            return [future.result(timeout=timeout) for future in futures]
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next document
+            self._reset_pool(pool)
+            raise
+
+    def _ocr_key(self, page):
+        return {"ocr": page_hash(page), "language": self.language, "dpi": self.dpi}
+
+    def _ocr(self, pdf_bytes, pages, numbers, in_worker, timeout, start=0):
+        """
+        Replace the given 0-based pages with their OCR text, pages holding the document's
+        pages from start on. Returns the number of pages served from the cache.
+        """
+        with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+            keys = {number: self._ocr_key(doc[number]) for number in numbers}
+        missing = []
+        for number in numbers:
+            page = self.ocr_cache.get(keys[number])
+            if page is None:
+                missing.append(number)
+            else:
+                pages[number - start] = dict(page, page_number=number + 1)
+
+        if missing:
+            inline = self.workers <= 1 or len(missing) == 1 or in_worker
+            count = 1 if inline else min(self.workers * 2, len(missing))
+            # Interleaved so each task gets a similar mix of pages
+            tasks = [(missing[first::count], self.language, self.dpi) for first in range(count)]
+            for (task_numbers, *_), results in zip(tasks, self._map(_ocr_pages, pdf_bytes, tasks, inline, timeout)):
+                for number, page in zip(task_numbers, results):
+                    if page is not None:
+                        pages[number - start] = page
+                        self.ocr_cache.put(keys[number], page)
+        return len(numbers) - len(missing)
+
+    def iter_pages(self, pdf_bytes, start=0, page_count=None, batch_pages=EXTRACT_MIN_CHUNK_PAGES):
+        """
+        Yield extract_page results from 0-based page start on, extracting them with
+        extract_pages in batches that double in size (8, 16, 32, ... pages).
+
+        A consumer that stops early (a spent token budget) never pays for more than the
+        batch it stopped in. Short documents stay in small inline batches; once a batch
+        reaches min_pages it is split across the pool, and each batch's scanned pages are
+        OCRed through the pool and cache.
+        """
+        if page_count is None:
+            with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+                page_count = len(doc)
+        while start < page_count:
+            stop = min(start + batch_pages, page_count)
+            pages, _ = self.extract_pages(pdf_bytes, page_count, start=start, stop=stop)
+            yield from pages
+            start, batch_pages = stop, batch_pages * 2
+
+    def extract_pages(self, pdf_bytes, page_count=None, timeout=EXTRACT_TIMEOUT_SECONDS, start=0, stop=None):
+        """
+        Extract the pages [start, stop) of an in-memory PDF, by default all of them.
+        Returns (pages, timing).
+
+        pages is a list of extract_page results in page order; timing holds the pages
+        extracted, range count, workers used, the pages OCRed (and how many of those
+        came from the cache), and wall-clock seconds in total and for OCR.
+        """
+        started = time.perf_counter()
+        if page_count is None:
+            with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+                page_count = len(doc)
+        stop = page_count if stop is None else stop
+
+        in_worker = multiprocessing.parent_process() is not None
+        inline = self.workers <= 1 or stop - start < self.min_pages or in_worker
+        ranges = [(start, stop)] if inline else [(start + first, start + last)
+                                                 for first, last in page_ranges(stop - start, self.workers)]
+        pages, numbers = [], []
+        for range_pages, range_numbers in self._map(_extract_range, pdf_bytes, ranges, inline, timeout):
+            pages += range_pages
+            numbers += range_numbers
+
+        ocr_start = time.perf_counter()
+        ocr_cached = 0
+        if numbers and not ocr_available():
+            print(f"{len(numbers)} scanned pages left without text")
+            numbers = []
+        if numbers:
+            ocr_cached = self._ocr(pdf_bytes, pages, numbers, in_worker, timeout, start)
+
+        timing = {
+            "pages": stop - start,
+            "ranges": len(ranges),
+            "workers": 1 if inline else min(self.workers, len(ranges)),
+            "ocr_pages": len(numbers),
+            "ocr_cached": ocr_cached,
+            "ocr_seconds": time.perf_counter() - ocr_start,
+            "seconds": time.perf_counter() - started,
+        }
+        with self._lock:
+            self._recent.append(timing)
+        return pages, timing
+
+    def stats(self):
+        """
+        Return per-document timings of the most recent extractions, oldest first, and
+        the OCR cache's counters.
+        """
+        with self._lock:
+            return {"workers": self.workers, "recent": list(self._recent), "ocr_cache": self.ocr_cache.stats()}
+
+    def shutdown(self, wait=True):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+extraction_service = ExtractionService()
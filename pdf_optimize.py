@@ -0,0 +1,88 @@
+import os
+import sys
+import zlib
+
+import pymupdf
+
+# Embedded raster images above PDF_IMAGE_MAX_DPI are resampled down to PDF_IMAGE_DPI
+PDF_IMAGE_DPI = int(os.environ.get("PDF_IMAGE_DPI", 150))
+PDF_IMAGE_MAX_DPI = int(os.environ.get("PDF_IMAGE_MAX_DPI", 200))
+PDF_IMAGE_QUALITY = int(os.environ.get("PDF_IMAGE_QUALITY", 80))
+PDF_OPTIMIZE = os.environ.get("PDF_OPTIMIZE", "1") != "0"
+
+
+def _downsample_images(doc, dpi, max_dpi, quality):
+    """
+    Resample images drawn above max_dpi down to dpi and recompress every image stream in place.
+
+    Each image keeps its xref, so pages and form XObjects that share it still share it.
+    Its samples are stored as JPEG or deflated, whichever is smaller; images with a soft
+    mask, unusual bit depths or colour spaces are left untouched.
+    """
+    seen = set()
+    for page in doc:
+        for xref, smask, width, height, bpc, colorspace, *_ in page.get_images(full=True):
+            if xref in seen or smask or bpc != 8 or colorspace not in ("DeviceRGB", "DeviceGray"):
+                continue
+            seen.add(xref)
+            rects = page.get_image_rects(xref)
+            if not rects:
+                continue
+            shown = max(rects, key=lambda rect: rect.width * rect.height)
+            pix = pymupdf.Pixmap(doc, xref)
+            if pix.alpha:
+                continue
+            if min(width * 72 / shown.width, height * 72 / shown.height) > max_dpi:
+                pix = pymupdf.Pixmap(pix, max(1, round(shown.width * dpi / 72)), max(1, round(shown.height * dpi / 72)), None)
+
+            jpeg = pix.tobytes("jpg", jpg_quality=quality)
+            deflated = zlib.compress(pix.samples, 9)
+            if len(jpeg) < len(deflated):
+                doc.update_stream(xref, jpeg, compress=False)
+                doc.xref_set_key(xref, "Filter", "/DCTDecode")
+            else:
+                doc.update_stream(xref, deflated, compress=False)
+                doc.xref_set_key(xref, "Filter", "/FlateDecode")
+            doc.xref_set_key(xref, "DecodeParms", "null")
+            doc.xref_set_key(xref, "Width", str(pix.width))
+            doc.xref_set_key(xref, "Height", str(pix.height))
+
+
+def optimize_pdf(pdf_bytes, dpi=PDF_IMAGE_DPI, max_dpi=PDF_IMAGE_MAX_DPI, quality=PDF_IMAGE_QUALITY):
+    """
+    Shrink an in-memory PDF and return the new bytes.
+
+    Raster images drawn above max_dpi are downsampled to dpi and recompressed, ReportLab's
+    ASCII85 stream wrapping is dropped, embedded fonts are subset, every stream is
+    deflated, and duplicate objects are merged. The original bytes are returned if optimizing fails or does not make
+    the file smaller.
+    """
+    try:
+        doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+        try:
+            _downsample_images(doc, dpi, max_dpi, quality)
+            # Embedded fonts (the Story engine embeds its own) keep only the glyphs used
+            doc.subset_fonts()
+            optimized = doc.tobytes(garbage=3, deflate=True, deflate_images=True, deflate_fonts=True, use_objstms=1)
+        finally:
+            doc.close()
+    except Exception as e:
+        print(f"Error optimizing PDF: {e}")
+        return pdf_bytes
+    return optimized if len(optimized) < len(pdf_bytes) else pdf_bytes
+
+
+def size_report(before, after):
+    """
+    Format a before/after byte count as e.g. "48,213 -> 9,870 bytes (-79.5%)".
+    """
+    change = (after - before) / before if before else 0.0
+    return f"{before:,} -> {after:,} bytes ({change:+.1%})"
+
+
+if __name__ == "__main__":
+    # python pdf_optimize.py report.pdf [...]: print the saving for each file without changing it
+    for path in sys.argv[1:]:
+        with open(path, "rb") as f:
+            original = f.read()
+        print(f"{path}: {size_report(len(original), len(optimize_pdf(original)))}")
@@ -0,0 +1,263 @@
+import re
+from collections import Counter
+
+import pymupdf
+
+from prompt_compaction import MIN_DEDUPE_CHARS
+
+# Marks that open a list item; ReportLab's BULLET is the first
+BULLET_MARKS = "•●▪◦"
+# Lines whose tops are this close (pt) share a row, e.g. the cells of one table row
+ROW_TOLERANCE = 2.0
+# A line closer than this many font sizes below the previous one continues it (a wrapped line)
+WRAP_PITCH = 1.5
+# Bold text this much larger than the body size is a heading, as is any text HEADING_SCALE times its size
+HEADING_STEP = 1.5
+HEADING_SCALE = 1.5
+
+_BULLET_RE = re.compile(f"^[{BULLET_MARKS}]\\s*")
+
+
+def _is_bold(span):
+    return bool(span["flags"] & pymupdf.TEXT_FONT_BOLD) or "Bold" in span["font"]
+
+
+def page_lines(page, textpage=None):
+    """
+    Return a page's text lines with the layout facts structure detection needs.
+
+    Each line is {"text", "size", "bold", "ends_bold", "x0", "y0"}: bold means every
+    non-blank span is bold, ends_bold that the last one is. textpage may be an OCR
+    text page from Page.get_textpage_ocr.
+    """
+    lines = []
+    content = page.get_text("dict", flags=pymupdf.TEXTFLAGS_TEXT, textpage=textpage)
+    for block in content["blocks"]:
+        for line in block.get("lines", []):
+            spans = [span for span in line["spans"] if span["text"].strip()]
+            if not spans:
+                continue
+            text = " ".join("".join(span["text"] for span in line["spans"]).split())
+            lines.append({
+                "text": text,
+                "size": round(max(span["size"] for span in spans), 1),
+                "bold": all(_is_bold(span) for span in spans),
+                "ends_bold": _is_bold(spans[-1]),
+                "x0": round(line["bbox"][0], 1),
+                "y0": round(line["bbox"][1], 1),
+            })
+    return lines
+
+
+def _rows(lines):
+    """
+    Group a page's lines into rows of cells that share a top edge, top to bottom.
+    """
+    rows = []
+    for line in sorted(lines, key=lambda line: (line["y0"], line["x0"])):
+        if rows and line["y0"] - rows[-1][0]["y0"] <= ROW_TOLERANCE:
+            rows[-1].append(line)
+        else:
+            rows.append([line])
+    return [sorted(row, key=lambda line: line["x0"]) for row in rows]
+
+
+def _is_heading(line, body):
+    if _BULLET_RE.match(line["text"]):
+        return False
+    return line["size"] >= body * HEADING_SCALE or (line["bold"] and line["size"] >= body + HEADING_STEP)
+
+
+def _body_size(pages):
+    sizes = Counter()
+    for lines in pages:
+        for line in lines:
+            sizes[line["size"]] += len(line["text"])
+    return sizes.most_common(1)[0][0] if sizes else 0
+
+
+class _Builder:
+    """
+    Turns rows of lines, page by page, into nested {"heading", "content"} nodes.
+
+    content holds paragraphs (strings), bullet lists (lists of strings), tables
+    ({"columns", "rows"}) and sub-sections, in reading order.
+    """
+
+    def __init__(self, body, heading_sizes):
+        # Larger headings nest shallower; bold body-size lines sit one level below the smallest
+        self.body = body
+        self.levels = {size: level for level, size in enumerate(heading_sizes)}
+        self.bold_level = len(heading_sizes)
+        self.root = {"content": []}
+        self.stack = [(-1, self.root)]
+        self.seen = set()
+        self.top_headings = 0
+        self.table = None
+        self.last = None  # (kind, line) of the previous text line on this page
+
+    @property
+    def content(self):
+        return self.stack[-1][1]["content"]
+
+    def new_page(self):
+        self.close_table()
+        self.last = None
+
+    def close_table(self):
+        if self.table is None:
+            return
+        columns, rows = self.table["columns"], self.table["rows"]
+        self.table = None
+        previous = self.content[-1] if self.content else None
+        # A table broken across pages repeats its header row; join the pieces back up
+        if isinstance(previous, dict) and previous.get("columns") == columns:
+            previous["rows"] += rows
+        elif rows or columns:
+            self.content.append({"columns": columns, "rows": rows})
+
+    def _wraps(self, line):
+        return (self.last is not None
+                and line["y0"] - self.last[1]["y0"] <= WRAP_PITCH * max(line["size"], self.last[1]["size"]))
+
+    def _column(self, line):
+        starts = self.table["x0"]
+        return max((index for index, x0 in enumerate(starts) if x0 - ROW_TOLERANCE <= line["x0"]), default=0)
+
+    def _append_cells(self, row, cells):
+        for line in row:
+            column = self._column(line)
+            cells[column] = f"{cells[column]} {line['text']}".strip()
+
+    def add_row(self, row):
+        if self.table is not None:
+            last_y0, size = self.table["y0"], max(line["size"] for line in row)
+            target = self.table["rows"][-1] if self.table["rows"] else self.table["columns"]
+            if row[0]["y0"] - last_y0 <= WRAP_PITCH * size:
+                # Wrapped lines of the previous row's cells
+                self._append_cells(row, target)
+                self.table["y0"] = row[0]["y0"]
+                return
+            if len(row) > 1:
+                cells = [""] * len(self.table["x0"])
+                self._append_cells(row, cells)
+                # A repeated header row (a table split into chunks) adds nothing
+                if cells != self.table["columns"]:
+                    self.table["rows"].append(cells)
+                self.table["y0"] = row[0]["y0"]
+                return
+            self.close_table()
+
+        if len(row) > 1:
+            self.last = None
+            self.table = {"x0": [line["x0"] for line in row], "y0": row[0]["y0"],
+                          "columns": [line["text"] for line in row], "rows": []}
+            return
+        self.add_line(row[0])
+
+    def add_line(self, line):
+        text = line["text"]
+        level = self.levels[line["size"]] if _is_heading(line, self.body) else None
+        continues = self._wraps(line)
+        if level is None and line["bold"] and not (continues and self.last[1]["ends_bold"]) \
+                and not _BULLET_RE.match(text):
+            level = self.bold_level
+        if level is not None:
+            self.add_heading(level, text)
+            self.last = ("heading", line)
+            return
+
+        content = self.content
+        marker = _BULLET_RE.match(text)
+        if marker:
+            item = text[marker.end():]
+            if not (content and isinstance(content[-1], list)):
+                content.append([])
+            content[-1].append(item)
+            self.last = ("bullet", line)
+        elif continues and self.last[0] in ("bullet", "paragraph"):
+            if self.last[0] == "bullet":
+                content[-1][-1] += " " + text
+            else:
+                content[-1] += " " + text
+            self.last = (self.last[0], line)
+        else:
+            content.append(text)
+            self.last = ("paragraph", line)
+
+    def add_heading(self, level, text):
+        while self.stack[-1][0] >= level:
+            self.stack.pop()
+        self.top_headings += level == 0
+        node = {"heading": text.rstrip(":").strip(), "content": []}
+        self.content.append(node)
+        self.stack.append((level, node))
+
+    def dedupe(self, content):
+        """
+        Drop paragraphs and list items repeated earlier in the document, such as
+        running headers, and any list left empty.
+        """
+        kept = []
+        for item in content:
+            if isinstance(item, str):
+                if len(item) >= MIN_DEDUPE_CHARS and item in self.seen:
+                    continue
+                self.seen.add(item)
+            elif isinstance(item, list):
+                item = [entry for entry in self.dedupe(item) if entry]
+                if not item:
+                    continue
+            elif "heading" in item:
+                item["content"] = self.dedupe(item["content"])
+            kept.append(item)
+        return kept
+
+
+def _compact(content):
+    """
+    Collapse _Builder nodes into the form sent to GPT: sections become {heading: content}
+    (neighbouring sections share one dict), tables become lists of " | "-joined rows
+    under their header row, and content with a single item is unwrapped.
+    """
+    items = []
+    for item in content:
+        if isinstance(item, dict) and "heading" in item:
+            value = _compact(item["content"])
+            previous = items[-1] if items else None
+            if isinstance(previous, dict) and item["heading"] not in previous:
+                previous[item["heading"]] = value
+            else:
+                items.append({item["heading"]: value})
+        elif isinstance(item, dict):
+            items.append([" | ".join(row) for row in [item["columns"]] + item["rows"]])
+        else:
+            items.append(item)
+    return items[0] if len(items) == 1 else items
+
+
+def document_structure(pages):
+    """
+    Rebuild a document's headings, bullet lists and tables from page_lines output.
+
+    Headings are told apart by font size and weight, table rows are lines that share a
+    top edge (cells are assigned to the header row's columns), and wrapped lines are
+    joined back up. Repeated paragraphs are dropped. Returns {"title", "sections"} when
+    the document opens with a single top-level heading, as our reports do, otherwise
+    {"sections"}; see _compact for the shape of sections.
+    """
+    pages = list(pages)
+    body = _body_size(pages)
+    heading_sizes = sorted({line["size"] for lines in pages for line in lines if _is_heading(line, body)}, reverse=True)
+    builder = _Builder(body, heading_sizes)
+    for lines in pages:
+        builder.new_page()
+        for row in _rows(lines):
+            builder.add_row(row)
+    builder.close_table()
+
+    content = builder.dedupe(builder.root["content"])
+    if builder.top_headings == 1 and content and isinstance(content[0], dict) and "heading" in content[0]:
+        # The report title; everything after it nests under it
+        return {"title": content[0]["heading"], "sections": _compact(content[0]["content"] + content[1:])}
+    return {"sections": _compact(content)}
@@ -0,0 +1,224 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+
+# Per-report input budget for the CEO mandate prompt
+REPORT_TOKEN_BUDGET = int(os.environ.get("REPORT_TOKEN_BUDGET", 2500))
+# gpt-4o tokenizers average roughly four characters of English per token
+CHARS_PER_TOKEN = 4
+# Shorter lines are usually table cells ("20%", "Delegate") that legitimately repeat
+MIN_DEDUPE_CHARS = 25
+# Running headers and footers live in the first/last few lines of a page
+EDGE_LINES = 2
+TRUNCATION_MARKER = "[truncated]"
+# Pages are read until their raw text reaches this multiple of the budget, even if
+# deduping leaves less; a document that repeats itself is not read to the end
+RAW_BUDGET_HEADROOM = 2
+
+_WHITESPACE_RE = re.compile(r"[ \t\u00a0\u2000-\u200b]+")
+_PAGE_STAMP_RE = re.compile(r"^(page\s*)?\d+(\s*(of|/)\s*\d+)?$", re.IGNORECASE)
+
+
+def estimate_tokens(text):
+    """
+    Estimate the token count of text without a tokenizer dependency.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _pages_tokens(pages):
+    return sum(estimate_tokens("\n".join(lines)) for _, lines in pages)
+
+
+def normalize_whitespace(text):
+    """
+    Collapse whitespace runs inside lines and drop blank lines.
+    """
+    lines = (_WHITESPACE_RE.sub(" ", line).strip() for line in text.splitlines())
+    return [line for line in lines if line]
+
+
+def drop_repeated_boilerplate(pages):
+    """
+    Keep only the first occurrence of page-edge lines that recur on at least half of the
+    pages, such as running headers and footers. "Page n of m" stamps all count as one line.
+    """
+    if len(pages) < 2:
+        return pages
+
+    def line_key(line):
+        return "<page stamp>" if _PAGE_STAMP_RE.match(line) else line
+
+    def edge_keys(lines):
+        return {line_key(line) for line in lines[:EDGE_LINES] + lines[-EDGE_LINES:]}
+
+    page_counts = Counter()
+    for _, lines in pages:
+        page_counts.update(edge_keys(lines))
+    threshold = max(2, math.ceil(len(pages) / 2))
+    boilerplate = {line for line, count in page_counts.items() if count >= threshold}
+
+    seen = set()
+    compacted = []
+    for page_number, lines in pages:
+        edges = edge_keys(lines)
+        kept = []
+        for line in lines:
+            key = line_key(line)
+            if key in boilerplate and key in edges:
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(line)
+        compacted.append((page_number, kept))
+    return compacted
+
+
+def dedupe_lines(pages):
+    """
+    Drop exact repeats of content lines across the whole report.
+    """
+    seen = set()
+    compacted = []
+    for page_number, lines in pages:
+        kept = []
+        for line in lines:
+            if len(line) >= MIN_DEDUPE_CHARS:
+                if line in seen:
+                    continue
+                seen.add(line)
+            kept.append(line)
+        compacted.append((page_number, kept))
+    return compacted
+
+
+def enforce_budget(pages, token_budget):
+    """
+    Keep whole lines in page order until the token budget is spent.
+    """
+    remaining = token_budget * CHARS_PER_TOKEN
+    compacted = []
+    for page_number, lines in pages:
+        kept = []
+        for line in lines:
+            if len(line) + 1 > remaining:
+                kept.append(TRUNCATION_MARKER)
+                compacted.append((page_number, kept))
+                return compacted
+            kept.append(line)
+            remaining -= len(line) + 1
+        compacted.append((page_number, kept))
+    return compacted
+
+
+def budgeted_pages(pages, token_budget=REPORT_TOKEN_BUDGET):
+    """
+    Pass extracted pages through until their text has used up token_budget.
+
+    Text is counted the way it is sent: whitespace collapsed, page stamps dropped and
+    lines repeated from earlier pages (running headers, repeated table headers) counted
+    once. Reading also stops once the whitespace-collapsed text with its repeats reaches
+    RAW_BUDGET_HEADROOM times the budget. The page that crosses either limit is still
+    passed on, so the budget can be filled exactly later; pages after it are never
+    requested, and a generator source (such as ExtractionService.iter_pages) is closed.
+    """
+    used = raw = 0
+    seen = set()
+    try:
+        for page in pages:
+            yield page
+            lines = normalize_whitespace(page.get("text", ""))
+            kept = []
+            for line in lines:
+                if _PAGE_STAMP_RE.match(line) or (len(line) >= MIN_DEDUPE_CHARS and line in seen):
+                    continue
+                seen.add(line)
+                kept.append(line)
+            used += estimate_tokens("\n".join(kept))
+            raw += estimate_tokens("\n".join(lines))
+            if used >= token_budget or raw >= token_budget * RAW_BUDGET_HEADROOM:
+                return
+    finally:
+        if hasattr(pages, "close"):
+            pages.close()
+
+
+def enforce_structure_budget(value, token_budget):
+    """
+    Keep the strings of a structured report (pdf_structure.document_structure sections)
+    in reading order until the token budget is spent; headings count against it too.
+    """
+    remaining = token_budget * CHARS_PER_TOKEN
+
+    def trim(value):
+        nonlocal remaining
+        if remaining < 0:
+            return None
+        if isinstance(value, str):
+            if len(value) + 1 > remaining:
+                remaining = -1
+                return TRUNCATION_MARKER
+            remaining -= len(value) + 1
+            return value
+        if isinstance(value, list):
+            return [item for item in map(trim, value) if item is not None]
+        if isinstance(value, dict):
+            kept = {}
+            for key, item in value.items():
+                heading = trim(key)
+                if heading is None:
+                    break
+                kept[heading] = trim(item) if remaining >= 0 else []
+            return kept
+        return value
+
+    return trim(value)
+
+
+def _compact_structure(report, token_budget, name):
+    stats = {"original": estimate_tokens(json.dumps(report["sections"]))}
+    sections = enforce_structure_budget(report["sections"], token_budget)
+    stats["budget"] = estimate_tokens(json.dumps(sections))
+    print(f"Compacted {name}: {stats['original']} -> {stats['budget']} tokens (structured, budget -{stats['original'] - stats['budget']})")
+    return dict(report, sections=sections), stats
+
+
+def compact_report(report, token_budget=REPORT_TOKEN_BUDGET, name="report"):
+    """
+    Compact an extracted {"pages": [{"page_number", "text"}]} report before it is sent to GPT.
+
+    Runs whitespace normalization, cross-page boilerplate removal, line dedupe and the
+    token budget in that order, and prints how many tokens each step saved. Structured
+    {"sections"} reports (see pdf_structure) are already deduplicated and only have the
+    budget applied. Anything else is returned unchanged. Returns (report, stats).
+    """
+    if isinstance(report, dict) and "sections" in report and "pages" not in report:
+        return _compact_structure(report, token_budget, name)
+    if not isinstance(report, dict) or not isinstance(report.get("pages"), list):
+        return report, {}
+
+    raw_pages = report["pages"]
+    stats = {"original": sum(estimate_tokens(page.get("text", "")) for page in raw_pages)}
+
+    pages = [(page.get("page_number"), normalize_whitespace(page.get("text", ""))) for page in raw_pages]
+    stats["whitespace"] = _pages_tokens(pages)
+    pages = drop_repeated_boilerplate(pages)
+    stats["boilerplate"] = _pages_tokens(pages)
+    pages = dedupe_lines(pages)
+    stats["duplicates"] = _pages_tokens(pages)
+    pages = enforce_budget(pages, token_budget)
+    stats["budget"] = _pages_tokens(pages)
+
+    steps = ["original", "whitespace", "boilerplate", "duplicates", "budget"]
+    savings = ", ".join(f"{step} -{stats[prev] - stats[step]}" for prev, step in zip(steps, steps[1:]))
+    print(f"Compacted {name}: {stats['original']} -> {stats['budget']} tokens ({savings})")
+
+    compacted = {
+        "pages": [
+            {"page_number": page_number, "text": "\n".join(lines)}
+            for page_number, lines in pages if lines
+        ]
+    }
+    return compacted, stats
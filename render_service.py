@@ -0,0 +1,206 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pdf_optimize import PDF_OPTIMIZE, optimize_pdf
+from report_payload import embed_report_json
+import report_rendering
+import story_rendering
+
+# Worker processes, and how many jobs may be queued or running before callers wait
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", min(4, os.cpu_count() or 1)))
+RENDER_MAX_PENDING = int(os.environ.get("RENDER_MAX_PENDING", 16))
+RENDER_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("RENDER_QUEUE_TIMEOUT_SECONDS", 30))
+RENDER_TIMEOUT_SECONDS = float(os.environ.get("RENDER_TIMEOUT_SECONDS", 120))
+RECENT_JOBS = 100
+
+# PDF writers by name: ReportLab platypus, or PyMuPDF's HTML Story layout
+ENGINES = {
+    "reportlab": report_rendering.render_pdf,
+    "story": story_rendering.render_pdf,
+}
+RENDER_ENGINE = os.environ.get("RENDER_ENGINE", "reportlab")
+
+
+def _engine_name(engine):
+    engine = engine or RENDER_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown PDF engine: {engine}")
+    return engine
+
+
+def _render_optimized(sections, engine):
+    """
+    Render sections with the named engine and shrink the result. Returns (pdf_bytes, unoptimized_size).
+    """
+    pdf_bytes = ENGINES[engine](sections)
+    raw_size = len(pdf_bytes)
+    if PDF_OPTIMIZE:
+        pdf_bytes = optimize_pdf(pdf_bytes)
+    return pdf_bytes, raw_size
+
+
+def _render_job(sections, engine, submitted_at):
+    """
+    Render one report in a worker process. Returns (pdf_bytes, raw_size, queue_seconds, render_seconds).
+    """
+    started = time.time()
+    pdf_bytes, raw_size = _render_optimized(sections, engine)
+    return pdf_bytes, raw_size, started - submitted_at, time.time() - started
+
+
+class RenderService:
+    """
+    Renders report sections to PDF bytes in a pool of worker processes.
+
+    ReportLab's doc.build is CPU-bound; running it in the Streamlit server process
+    makes every session wait on one interpreter's GIL. Sections are plain dicts, so
+    they pickle cheaply to the workers. At most max_pending jobs are queued or running;
+    further submits wait up to queue_timeout for a slot and are then rejected.
+    """
+
+    def __init__(self, workers=RENDER_WORKERS, max_pending=RENDER_MAX_PENDING, queue_timeout=RENDER_QUEUE_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.jobs = 0
+        self.failures = 0
+        self.rejected = 0
+        self._recent = deque(maxlen=RECENT_JOBS)
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _reset_pool(self, pool):
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _record(self, queue_seconds, render_seconds, raw_size, size):
+        with self._lock:
+            self.jobs += 1
+            self._recent.append({
+                "queue_seconds": queue_seconds,
+                "render_seconds": render_seconds,
+                "raw_bytes": raw_size,
+                "bytes": size,
+            })
+
+    def submit(self, sections, engine=None):
+        """
+        Queue a report for rendering and return a Future resolving to its PDF bytes.
+
+        engine names an ENGINES entry; RENDER_ENGINE is used by default.
+        """
+        engine = _engine_name(engine)
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise RuntimeError(f"PDF render queue is full ({self.max_pending} jobs pending).")
+        with self._lock:
+            self.pending += 1
+
+        result = Future()
+        pool = self._get_pool()
+
+        def release(error=None):
+            self._slots.release()
+            with self._lock:
+                self.pending -= 1
+                if error is not None:
+                    self.failures += 1
+            if isinstance(error, BrokenProcessPool):
+                # A worker died; start a fresh pool for the next job
+                self._reset_pool(pool)
+
+        def finish(job):
+            error = job.exception()
+            release(error)
+            if error is not None:
+                result.set_exception(error)
+                return
+            pdf_bytes, raw_size, queue_seconds, render_seconds = job.result()
+            self._record(queue_seconds, render_seconds, raw_size, len(pdf_bytes))
+            result.set_result(pdf_bytes)
+
+        try:
+            job = pool.submit(_render_job, sections, engine, time.time())
+        except Exception as e:
+            release(e)
+            raise
+        job.add_done_callback(finish)
+        return result
+
+    def render(self, sections, timeout=RENDER_TIMEOUT_SECONDS, engine=None):
+        """
+        Render sections to PDF bytes in the pool and wait for the result.
+
+        Renders inline when the pool is disabled (RENDER_WORKERS=0) or when already
+        running inside a worker process, such as the gpt2 batch runner's.
+        """
+        if self.workers <= 0 or multiprocessing.parent_process() is not None:
+            start = time.perf_counter()
+            pdf_bytes, raw_size = _render_optimized(sections, _engine_name(engine))
+            self._record(0.0, time.perf_counter() - start, raw_size, len(pdf_bytes))
+            return pdf_bytes
+        return self.submit(sections, engine).result(timeout=timeout)
+
+    def render_report(self, report, timeout=RENDER_TIMEOUT_SECONDS, engine=None):
+        """
+        Render a report dict to PDF bytes.
+
+        A report is {"sections": [...]} plus, optionally, the "report_type" and "payload"
+        to embed as its report.json. Backends build these so a page can show the
+        sections straight away and render the PDF only when it is downloaded.
+        """
+        pdf_bytes = self.render(report["sections"], timeout, engine)
+        if report.get("report_type"):
+            pdf_bytes = embed_report_json(pdf_bytes, report["report_type"], report.get("payload"))
+        return pdf_bytes
+
+    def stats(self):
+        """
+        Return job counters, queue/render timings and PDF sizes over the most recent jobs.
+
+        recent_sizes lists each job's (bytes before, bytes after) the size optimizer.
+        """
+        with self._lock:
+            recent = list(self._recent)
+            stats = {
+                "workers": self.workers,
+                "pending": self.pending,
+                "jobs": self.jobs,
+                "failures": self.failures,
+                "rejected": self.rejected,
+            }
+        if recent:
+            render_times = sorted(job["render_seconds"] for job in recent)
+            stats["avg_queue_seconds"] = sum(job["queue_seconds"] for job in recent) / len(recent)
+            stats["avg_render_seconds"] = sum(render_times) / len(render_times)
+            stats["p95_render_seconds"] = render_times[max(0, int(len(render_times) * 0.95) - 1)]
+            stats["recent_sizes"] = [(job["raw_bytes"], job["bytes"]) for job in recent]
+            raw_total = sum(job["raw_bytes"] for job in recent)
+            stats["size_reduction"] = 1 - sum(job["bytes"] for job in recent) / raw_total if raw_total else 0.0
+        return stats
+
+    def shutdown(self, wait=True):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+render_service = RenderService()
@@ -0,0 +1,128 @@
+import base64
+import html
+import io
+import zipfile
+
+import streamlit as st
+
+from render_service import render_service
+from report_rendering import coolwarm
+
+
+def _text(value):
+    """
+    Turn section text, which may hold ReportLab paragraph markup (<b>, &amp;), into
+    Markdown with any other HTML escaped, since it includes GPT output and PDF text.
+    """
+    text = str(value).replace("<b>", "**").replace("</b>", "**")
+    return html.escape(html.unescape(text), quote=False)
+
+
+def _table_markdown(section):
+    def cell(value):
+        # Pipes and line breaks would end the cell early
+        return _text(value).replace("|", "\\|").replace("\n", "<br>")
+
+    lines = [
+        "| " + " | ".join(cell(label) for label in section["header"]) + " |",
+        "|" + "---|" * len(section["header"]),
+    ]
+    lines += ["| " + " | ".join(cell(value) for value in row) + " |" for row in section["rows"]]
+    return "\n".join(lines)
+
+
+def _heatmap_markdown(section):
+    rows = section.get("rows")
+    values = [score for _, scores in rows or [] for score in scores]
+    if not values or len({len(scores) for _, scores in rows}) != 1:
+        return f"_{section.get('placeholder', 'Heatmap Not Available')}_"
+
+    low, high = min(values), max(values)
+
+    def shade(score):
+        return "#" + coolwarm((score - low) / (high - low) if high > low else 0.5).hexval()[2:]
+
+    body = "".join(
+        f"<tr><td><b>{html.escape(str(label))}</b></td>"
+        + "".join(f'<td style="background-color: {shade(score)}; text-align: center">{score:g}</td>' for score in scores)
+        + "</tr>"
+        for label, scores in rows
+    )
+    header = "<tr><th></th>" + "".join(f"<th>{column + 1}</th>" for column in range(len(rows[0][1]))) + "</tr>"
+    return f"**{_text(section.get('title', ''))}**\n\n<table>{header}{body}</table>"
+
+
+def _section_markdown(section):
+    kind = section["type"]
+    if kind == "title":
+        return f"## {_text(section['text'])}"
+    if kind == "heading":
+        return f"#### {_text(section['text'])}"
+    if kind == "paragraph":
+        return _text(section["text"])
+    if kind == "bullets":
+        items = section.get("items") or []
+        if isinstance(items, str):
+            items = [items]
+        return "\n".join(f"- {_text(item)}" for item in items)
+    if kind == "table":
+        return _table_markdown(section)
+    if kind == "image":
+        source = section["source"]
+        if not isinstance(source, bytes):
+            with open(source, "rb") as f:
+                source = f.read()
+        return f'<img src="data:image/png;base64,{base64.b64encode(source).decode("ascii")}" width="{section["width"]}">'
+    if kind == "heatmap":
+        return _heatmap_markdown(section)
+    if kind == "spacer":
+        return ""
+    raise ValueError(f"Unknown report section type: {kind}")
+
+
+def report_markdown(sections):
+    """
+    Turn declarative report sections into Markdown (with inline HTML for heatmaps and images).
+
+    Takes the same sections as the PDF engines and needs no layout pass, so a report can
+    be shown as soon as its data is ready. A section that fails to convert is skipped.
+    """
+    parts = []
+    for section in sections:
+        try:
+            parts.append(_section_markdown(section))
+        except Exception as e:
+            print(f"Error rendering {section.get('type')} section: {e}")
+    return "\n\n".join(part for part in parts if part)
+
+
+def show_report(report):
+    """
+    Display a report dict (see RenderService.render_report) in the page.
+
+    Only the HTML report_markdown generates itself is let through; section text is escaped.
+    """
+    st.markdown(report_markdown(report["sections"]), unsafe_allow_html=True)
+
+
+def lazy_pdf(report):
+    """
+    Return a callable that renders a report's PDF, for st.download_button's data.
+
+    Streamlit calls it only when the button is clicked, on a thread of its own, and the
+    render runs in the render_service pool, so the page never waits on ReportLab.
+    """
+    return lambda: render_service.render_report(report)
+
+
+def lazy_zip(reports):
+    """
+    Like lazy_pdf, for several reports zipped together; reports maps file names to reports.
+    """
+    def build():
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as zf:
+            for name, report in reports.items():
+                zf.writestr(name, render_service.render_report(report))
+        return buffer.getvalue()
+    return build
@@ -0,0 +1,47 @@
+import json
+
+import pymupdf
+
+# Name of the embedded file carrying a report's machine-readable source data
+EMBEDDED_REPORT_NAME = "report.json"
+PAYLOAD_VERSION = 1
+
+
+def embed_report_json(pdf_bytes, report_type, payload):
+    """
+    Attach the JSON a report was rendered from to an in-memory PDF and return the new bytes.
+
+    The PDF stays a normal, printable report; readers that know about the attachment
+    (gpt5) can load the structured data instead of re-extracting text. Embedding is
+    best effort: a failure is logged and the PDF is returned unchanged.
+    """
+    data = json.dumps(
+        {"report_type": report_type, "version": PAYLOAD_VERSION, "data": payload},
+        default=str,
+    ).encode("utf-8")
+    try:
+        doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+        try:
+            doc.embfile_add(EMBEDDED_REPORT_NAME, data, filename=EMBEDDED_REPORT_NAME, desc=f"{report_type} source data")
+            return doc.tobytes(garbage=3, deflate=True, use_objstms=1)
+        finally:
+            doc.close()
+    except Exception as e:
+        print(f"Error embedding report JSON into {report_type} PDF: {e}")
+        return pdf_bytes
+
+
+def read_embedded_json(doc):
+    """
+    Return the embedded report payload of an open PyMuPDF document, or None for foreign PDFs.
+    """
+    try:
+        if EMBEDDED_REPORT_NAME not in doc.embfile_names():
+            return None
+        payload = json.loads(doc.embfile_get(EMBEDDED_REPORT_NAME))
+    except Exception as e:
+        print(f"Error reading embedded report JSON: {e}")
+        return None
+    if not isinstance(payload, dict) or "data" not in payload:
+        return None
+    return payload
@@ -0,0 +1,290 @@
+import copy
+import io
+import os
+from types import MappingProxyType
+
+from reportlab.graphics.shapes import Drawing, Group, Rect, String
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Image, LongTable, Paragraph, SimpleDocTemplate, Spacer, TableStyle
+
+from fragment_cache import fragment_cache
+
+# Styles are compiled once per process and shared by every report. They are read-only:
+# derive a new ParagraphStyle(parent=...) instead of changing one in place.
+_SAMPLE_STYLES = getSampleStyleSheet()
+_NORMAL = ParagraphStyle("ReportNormal", parent=_SAMPLE_STYLES["Normal"])
+STYLES = MappingProxyType({
+    "title": ParagraphStyle("ReportTitle", parent=_SAMPLE_STYLES["Title"], alignment=1),
+    "heading": ParagraphStyle("ReportHeading", parent=_SAMPLE_STYLES["Heading2"]),
+    "heading_compact": ParagraphStyle("ReportHeadingCompact", parent=_SAMPLE_STYLES["Heading2"], spaceAfter=6),
+    "normal": _NORMAL,
+    "bullet": ParagraphStyle("ReportBullet", parent=_NORMAL, bulletIndent=20),
+    # Table cells wrap at a smaller size so wide tables fit the page
+    "cell": ParagraphStyle("ReportCell", parent=_NORMAL, fontName="Helvetica", fontSize=8, leading=10),
+    "cell_header": ParagraphStyle("ReportCellHeader", parent=_NORMAL, fontName="Helvetica-Bold", fontSize=8, leading=10),
+})
+
+# Plain-string cells are drawn in the same face and size as wrapped "cell" Paragraphs
+CELL_FONT = "Helvetica"
+CELL_FONT_SIZE = 8
+CELL_PADDING = 12  # default left + right cell padding
+# Frame height of SimpleDocTemplate's default one-inch margins and 6pt padding
+FRAME_HEIGHT = letter[1] - 2 * 72 - 2 * 6
+# Rows per LongTable when a long table is laid out in chunks
+TABLE_CHUNK_ROWS = int(os.environ.get("TABLE_CHUNK_ROWS", 500))
+
+_HEADER_TABLE_COMMANDS = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#D3D3D3')),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONT', (0, 1), (-1, -1), CELL_FONT, CELL_FONT_SIZE, 10),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+]
+TABLE_STYLES = MappingProxyType({
+    # Grey bold header row, grid, values centred from the second column on
+    "centered_values": TableStyle(_HEADER_TABLE_COMMANDS + [('ALIGN', (1, 1), (-1, -1), 'CENTER')]),
+    # Same, but only the first column (a rank or index) is centred
+    "centered_first_column": TableStyle(_HEADER_TABLE_COMMANDS + [('ALIGN', (0, 1), (0, -1), 'CENTER')]),
+})
+
+BULLET = "•"
+DEFAULT_SPACE = 12
+
+# matplotlib's "coolwarm" diverging scale sampled at nine even stops, low to high
+COOLWARM_STOPS = [
+    (0.2298, 0.2987, 0.7537), (0.3837, 0.5102, 0.9178), (0.5543, 0.6901, 0.9955),
+    (0.7240, 0.8149, 0.9757), (0.8674, 0.8644, 0.8626), (0.9595, 0.7670, 0.6741),
+    (0.9567, 0.5980, 0.4773), (0.8654, 0.3711, 0.2958), (0.7057, 0.0156, 0.1502),
+]
+COLORBAR_STEPS = 32
+
+
+def _needs_wrap(text, width):
+    """
+    Whether a text cell needs a wrapping Paragraph, or fits as a cheap plain string.
+    """
+    if width is None or "<" in text or "&" in text:
+        return True
+    return max(stringWidth(line, CELL_FONT, CELL_FONT_SIZE) for line in text.split("\n")) > width - CELL_PADDING
+
+
+def table_cells(header, rows, col_widths=None, wrap_columns=None):
+    """
+    Turn a header and rows into table cells.
+
+    Text that fits its column, or lies outside wrap_columns, stays a plain string;
+    only longer text (or text with markup) becomes a wrapping Paragraph, which is far
+    more expensive to lay out.
+    """
+    def cell(value, column):
+        if not isinstance(value, str) or (wrap_columns is not None and column not in wrap_columns):
+            return value
+        width = col_widths[column] if col_widths else None
+        return Paragraph(value, STYLES["cell"]) if _needs_wrap(value, width) else value
+
+    data = [[Paragraph(str(label), STYLES["cell_header"]) for label in header]]
+    for row in rows:
+        data.append([cell(value, column) for column, value in enumerate(row)])
+    return data
+
+
+def _make_table(cells, col_widths=None, style="centered_values", wrap_columns=None, row_heights=None):
+    # LongTable lays out long tables faster; the header row repeats on every page and
+    # a row taller than the space left is split across pages instead of failing layout
+    table = LongTable(cells, colWidths=col_widths, rowHeights=row_heights, repeatRows=1, splitInRow=1)
+    table.setStyle(TABLE_STYLES[style])
+    if wrap_columns:
+        # Text columns stay left-aligned whether a cell wrapped or not
+        table.setStyle(TableStyle([('ALIGN', (column, 1), (column, -1), 'LEFT') for column in wrap_columns]))
+    return table
+
+
+def _make_tables(cells, col_widths=None, style="centered_values", wrap_columns=None, row_heights=None):
+    """
+    Lay out cells as one LongTable per TABLE_CHUNK_ROWS rows, each starting with the header.
+
+    Every page split re-measures the rows still to place, so a single 10,000-row table
+    costs quadratic time; bounded chunks keep it linear.
+    """
+    header, body = cells[:1], cells[1:]
+    tables = []
+    for start in range(0, max(len(body), 1), TABLE_CHUNK_ROWS):
+        chunk_heights = None
+        if row_heights:
+            chunk_heights = row_heights[:1] + row_heights[1 + start:1 + start + TABLE_CHUNK_ROWS]
+        tables.append(_make_table(header + body[start:start + TABLE_CHUNK_ROWS], col_widths, style, wrap_columns, chunk_heights))
+    return tables
+
+
+def table_flowables(header, rows, col_widths=None, style="centered_values", wrap_columns=None, row_heights=None):
+    """
+    Build a header-plus-rows table whose long text cells wrap inside their column.
+
+    wrap_columns names the left-aligned text columns that may wrap; by default any
+    column may. Returns a list of flowables, since very long tables are chunked.
+    """
+    return _make_tables(table_cells(header, rows, col_widths, wrap_columns), col_widths, style, wrap_columns, row_heights)
+
+
+def _measured_table(section):
+    """
+    Build a table section's cells and, when its column widths are fixed, measure its row heights.
+    """
+    cells = table_cells(section["header"], section["rows"], section.get("col_widths"), section.get("wrap_columns"))
+    row_heights = None
+    if section.get("col_widths"):
+        table = _make_table(cells, section["col_widths"], section.get("table_style", "centered_values"), section.get("wrap_columns"))
+        table.wrap(*letter)
+        row_heights = list(table._rowHeights)
+        # A row that does not fit under the repeated header must be split, which fixed heights prevent
+        if any(row_heights[0] + height > FRAME_HEIGHT for height in row_heights[1:]):
+            row_heights = None
+    return cells, row_heights
+
+
+def _cached_tables(section):
+    """
+    Build a table's flowables from its cached cells and row heights, skipping markup parsing and measuring.
+    """
+    cells, row_heights = fragment_cache.get_or_build(section, lambda: _measured_table(section))
+    # Shallow copies keep each build's wrap state separate while sharing the parsed text
+    cells = [[copy.copy(cell) if isinstance(cell, Paragraph) else cell for cell in row] for row in cells]
+    return _make_tables(cells, section.get("col_widths"), section.get("table_style", "centered_values"),
+                        section.get("wrap_columns"), row_heights)
+
+
+def coolwarm(fraction):
+    """
+    Map a value in [0, 1] onto the coolwarm scale by linear interpolation between stops.
+    """
+    position = min(max(fraction, 0.0), 1.0) * (len(COOLWARM_STOPS) - 1)
+    index = min(int(position), len(COOLWARM_STOPS) - 2)
+    weight = position - index
+    low, high = COOLWARM_STOPS[index], COOLWARM_STOPS[index + 1]
+    return colors.Color(*(a + (b - a) * weight for a, b in zip(low, high)))
+
+
+def heatmap_drawing(title, rows, width=400, height=200, placeholder="Heatmap Not Available"):
+    """
+    Draw labelled rows of scores as a vector heatmap with a colorbar.
+
+    rows is a list of (label, scores) pairs of equal length. Colours span the min to
+    max of all scores, like matplotlib's imshow. Without usable rows, the placeholder
+    text is drawn instead.
+    """
+    drawing = Drawing(width, height)
+    values = [score for _, scores in rows or [] for score in scores]
+    if not values or len({len(scores) for _, scores in rows}) != 1:
+        drawing.add(String(width / 2, height / 2, placeholder, textAnchor="middle", fontName="Helvetica", fontSize=10))
+        return drawing
+
+    low, high = min(values), max(values)
+
+    def shade(score):
+        return coolwarm((score - low) / (high - low) if high > low else 0.5)
+
+    label_width, bar_width, bar_gap, tick_width = 40, 12, 10, 30
+    grid_left, grid_bottom = label_width, 18
+    grid_right = width - bar_gap - bar_width - tick_width
+    grid_top = height - 24
+    columns = len(rows[0][1])
+    cell_width = (grid_right - grid_left) / columns
+    cell_height = (grid_top - grid_bottom) / len(rows)
+
+    drawing.add(String((grid_left + grid_right) / 2, height - 14, title, textAnchor="middle", fontName="Helvetica-Bold", fontSize=11))
+    for row_index, (label, scores) in enumerate(rows):
+        y = grid_top - (row_index + 1) * cell_height
+        drawing.add(String(grid_left - 6, y + cell_height / 2 - 3, str(label), textAnchor="end", fontName="Helvetica", fontSize=8))
+        for column, score in enumerate(scores):
+            color = shade(score)
+            # Stroke in the fill colour so adjacent cells show no hairline seams
+            drawing.add(Rect(grid_left + column * cell_width, y, cell_width, cell_height, fillColor=color, strokeColor=color, strokeWidth=0.5))
+    for column in range(columns):
+        drawing.add(String(grid_left + (column + 0.5) * cell_width, grid_bottom - 11, str(column + 1), textAnchor="middle", fontName="Helvetica", fontSize=7))
+
+    # Colorbar with min, mid and max ticks
+    bar_left = grid_right + bar_gap
+    step_height = (grid_top - grid_bottom) / COLORBAR_STEPS
+    for step in range(COLORBAR_STEPS):
+        drawing.add(Rect(bar_left, grid_bottom + step * step_height, bar_width, step_height,
+                         fillColor=coolwarm((step + 0.5) / COLORBAR_STEPS), strokeColor=None))
+    drawing.add(Rect(bar_left, grid_bottom, bar_width, grid_top - grid_bottom, fillColor=None, strokeColor=colors.black, strokeWidth=0.5))
+    for fraction in (0.0, 0.5, 1.0):
+        y = grid_bottom + fraction * (grid_top - grid_bottom)
+        drawing.add(String(bar_left + bar_width + 3, y - 3, f"{low + fraction * (high - low):.1f}", fontName="Helvetica", fontSize=7))
+    caption = Group(String(0, 0, "Scores", textAnchor="middle", fontName="Helvetica", fontSize=7))
+    caption.translate(width - 2, (grid_top + grid_bottom) / 2)
+    caption.rotate(90)
+    drawing.add(caption)
+    return drawing
+
+
+def _flowables(section):
+    kind = section["type"]
+    style = STYLES[section.get("style", "heading" if kind == "heading" else "normal")]
+    if kind == "title":
+        return [Paragraph(section["text"], STYLES["title"]), Spacer(1, DEFAULT_SPACE)]
+    if kind in ("heading", "paragraph"):
+        return [Paragraph(str(section["text"]), style)]
+    if kind == "bullets":
+        items = section.get("items") or []
+        if isinstance(items, str):
+            items = [items]
+        return [Paragraph(f"{BULLET} {item}", style) for item in items]
+    if kind == "table" and section.get("cache"):
+        return _cached_tables(section)
+    if kind == "table":
+        return table_flowables(section["header"], section["rows"], section.get("col_widths"),
+                               section.get("table_style", "centered_values"), section.get("wrap_columns"))
+    if kind == "image":
+        source = section["source"]
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+        return [Image(source, width=section["width"], height=section["height"])]
+    if kind == "heatmap" and section.get("cache"):
+        # Layout marks flowables (e.g. as postponed to the next page), so each build gets its own copy
+        return [copy.copy(fragment_cache.get_or_build(section, lambda: _flowables(dict(section, cache=False))[0]))]
+    if kind == "heatmap":
+        return [heatmap_drawing(section.get("title", ""), section.get("rows"), section.get("width", 400),
+                                section.get("height", 200), section.get("placeholder", "Heatmap Not Available"))]
+    if kind == "spacer":
+        return [Spacer(1, section.get("height", DEFAULT_SPACE))]
+    raise ValueError(f"Unknown report section type: {kind}")
+
+
+def build_story(sections):
+    """
+    Turn declarative report sections into ReportLab flowables.
+
+    Each section is a dict with a "type" of title, heading, paragraph, bullets, table,
+    image (a path or encoded image bytes), heatmap or spacer. A section that fails to
+    render is logged and skipped, the same way the backends used to skip a broken block
+    of the report. Tables and heatmaps marked "cache": True are built from local data
+    only; they are laid out once per distinct input and then reused from fragment_cache.
+    """
+    story = []
+    for section in sections:
+        try:
+            story.extend(_flowables(section))
+        except Exception as e:
+            print(f"Error rendering {section.get('type')} section: {e}")
+    return story
+
+
+def render_pdf(sections, output=None):
+    """
+    Render sections to a letter-size PDF.
+
+    With no output the PDF is built in memory and its bytes are returned; otherwise it
+    is written to output (a path or a binary file object), which is returned. Page
+    streams are always compressed, whatever the global rl_config says.
+    """
+    if output is None:
+        buffer = io.BytesIO()
+        SimpleDocTemplate(buffer, pagesize=letter, pageCompression=1).build(build_story(sections))
+        return buffer.getvalue()
+    SimpleDocTemplate(output, pagesize=letter, pageCompression=1).build(build_story(sections))
+    return output
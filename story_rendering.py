@@ -0,0 +1,195 @@
+import html
+import io
+import os
+
+import pymupdf
+
+from report_rendering import BULLET, COLORBAR_STEPS, DEFAULT_SPACE, coolwarm
+
+# Letter paper with ReportLab SimpleDocTemplate's one-inch margins, so both engines paginate alike
+PAGE_RECT = pymupdf.paper_rect("letter")
+MARGIN = 72
+CONTENT_RECT = PAGE_RECT + (MARGIN, MARGIN, -MARGIN, -MARGIN)
+
+# The ReportLab sample styles (Title, Heading2, Normal) the other engine uses, as CSS
+REPORT_CSS = f"""
+* {{ font-family: sans-serif; }}
+body {{ font-size: 10pt; line-height: 12pt; }}
+p {{ margin: 0; }}
+h1 {{ font-size: 18pt; line-height: 22pt; text-align: center; margin: 0 0 {DEFAULT_SPACE + 6}pt 0; }}
+h2 {{ font-size: 14pt; line-height: 18pt; margin: 12pt 0 6pt 0; }}
+table {{ border-collapse: collapse; font-size: 8pt; line-height: 10pt; }}
+th, td {{ border: 0.5pt solid black; padding: 3pt 6pt; vertical-align: top; }}
+/* Story repaints a table cell's background on every later page the table reaches,
+   so the header is set off by a heavier rule instead of ReportLab's grey fill */
+th {{ font-weight: bold; text-align: left; border-bottom: 1.5pt solid black; }}
+td.center {{ text-align: center; }}
+table.heatmap td {{ border: none; padding: 0; }}
+table.heatmap td.label {{ text-align: right; padding-right: 6pt; }}
+table.heatmap td.tick {{ font-size: 7pt; text-align: center; }}
+p.heatmap-title {{ font-size: 11pt; font-weight: bold; text-align: center; margin: 6pt 0; }}
+"""
+
+
+def _markup(value):
+    """
+    Escape section text for HTML, keeping the ReportLab paragraph markup it may carry
+    (<b>, &amp;) and nothing else, such as tags in GPT output.
+    """
+    text = html.escape(html.unescape(str(value)), quote=False)
+    return text.replace("&lt;b&gt;", "<b>").replace("&lt;/b&gt;", "</b>")
+
+
+def _hex(color):
+    return "#%02x%02x%02x" % (round(color.red * 255), round(color.green * 255), round(color.blue * 255))
+
+
+def _table_html(section):
+    """
+    Lay out a table section as HTML. Story cannot repeat a header row on later pages,
+    so unlike the LongTable path the header appears once, above the first row.
+    """
+    widths = section.get("col_widths") or []
+    # Story clips at the page edge where ReportLab lets a wide table overhang the margins,
+    # so tables wider than the frame are scaled to fit
+    scale = min(1.0, CONTENT_RECT.width / sum(widths)) if widths else 1.0
+    header = "".join(
+        f'<th style="width: {widths[column] * scale - 12:.1f}pt">{_markup(label)}</th>' if column < len(widths) else f"<th>{_markup(label)}</th>"
+        for column, label in enumerate(section["header"])
+    )
+    first_centered = section.get("table_style") == "centered_first_column"
+    wrap_columns = section.get("wrap_columns") or []
+
+    def css_class(column):
+        # Mirrors TABLE_STYLES: centred value columns, except free-text (wrap) columns
+        centered = column == 0 if first_centered else column > 0
+        return ' class="center"' if centered and column not in wrap_columns else ""
+
+    rows = "".join(
+        "<tr>" + "".join(f"<td{css_class(column)}>{html.escape(str(value))}</td>" for column, value in enumerate(row)) + "</tr>"
+        for row in section["rows"]
+    )
+    return f"<table><tr>{header}</tr>{rows}</table>"
+
+
+def _heatmap_html(section):
+    """
+    Draw a heatmap section as a table of coloured cells with a low-to-high colour scale
+    underneath. Story rasterises SVG images, so the heatmap is built from HTML to stay
+    vector, like report_rendering.heatmap_drawing.
+    """
+    width, height = section.get("width", 400), section.get("height", 200)
+    rows = section.get("rows")
+    values = [score for _, scores in rows or [] for score in scores]
+    if not values or len({len(scores) for _, scores in rows}) != 1:
+        placeholder = section.get("placeholder", "Heatmap Not Available")
+        return f'<p class="heatmap-title" style="padding: {height / 2 - 6}pt 0">{html.escape(placeholder)}</p>'
+
+    low, high = min(values), max(values)
+
+    def shade(score):
+        return _hex(coolwarm((score - low) / (high - low) if high > low else 0.5))
+
+    label_width, legend_height = 40, 30
+    columns = len(rows[0][1])
+    cell_width = (width - label_width) / columns
+    cell_height = (height - 24 - legend_height) / len(rows)
+
+    body = "".join(
+        f'<tr><td class="label" style="width: {label_width - 6}pt">{html.escape(str(label))}</td>'
+        + "".join(f'<td style="width: {cell_width:.2f}pt; height: {cell_height:.2f}pt; background-color: {shade(score)}">&nbsp;</td>'
+                  for score in scores)
+        + "</tr>"
+        for label, scores in rows
+    )
+    ticks = "<tr><td></td>" + "".join(f'<td class="tick">{column + 1}</td>' for column in range(columns)) + "</tr>"
+    step_width = (width - 2 * label_width) / COLORBAR_STEPS
+    scale = "".join(
+        f'<td style="width: {step_width:.2f}pt; height: 8pt; background-color: {_hex(coolwarm((step + 0.5) / COLORBAR_STEPS))}">&nbsp;</td>'
+        for step in range(COLORBAR_STEPS)
+    )
+    legend = (f'<table class="heatmap"><tr><td class="label" style="width: {label_width - 6}pt">{low:.1f}</td>{scale}'
+              f'<td class="tick" style="width: {label_width}pt">{high:.1f}</td></tr></table>')
+    return (f'<p class="heatmap-title" style="width: {width}pt">{html.escape(section.get("title", ""))}</p>'
+            f'<table class="heatmap">{body}{ticks}</table>{legend}')
+
+
+def _image_html(source, width, height, archive):
+    if not isinstance(source, bytes):
+        with open(source, "rb") as f:
+            source = f.read()
+    # Story resolves <img src> against the archive
+    name = f"image{len(archive.entry_list)}"
+    archive.add(source, name)
+    return f'<p style="text-align: center"><img src="{name}" style="width: {width}pt; height: {height}pt"></p>'
+
+
+def _section_html(section, archive):
+    kind = section["type"]
+    if kind == "title":
+        return f"<h1>{_markup(section['text'])}</h1>"
+    if kind == "heading":
+        return f"<h2>{_markup(section['text'])}</h2>"
+    if kind == "paragraph":
+        return f"<p>{_markup(section['text'])}</p>"
+    if kind == "bullets":
+        items = section.get("items") or []
+        if isinstance(items, str):
+            items = [items]
+        return "".join(f"<p>{BULLET} {_markup(item)}</p>" for item in items)
+    if kind == "table":
+        return _table_html(section)
+    if kind == "image":
+        return _image_html(section["source"], section["width"], section["height"], archive)
+    if kind == "heatmap":
+        return _heatmap_html(section)
+    if kind == "spacer":
+        return f'<div style="height: {section.get("height", DEFAULT_SPACE)}pt"></div>'
+    raise ValueError(f"Unknown report section type: {kind}")
+
+
+def build_html(sections, archive):
+    """
+    Turn declarative report sections into one HTML document for a PyMuPDF Story.
+
+    Takes the same sections as report_rendering.build_story; text keeps its ReportLab
+    paragraph markup (<b>, &amp;), which is also valid HTML, and is otherwise escaped,
+    as are table cells. Images are added to archive.
+    A section that fails to render is logged and skipped.
+    """
+    parts = []
+    for section in sections:
+        try:
+            parts.append(_section_html(section, archive))
+        except Exception as e:
+            print(f"Error rendering {section.get('type')} section: {e}")
+    return "<body>" + "".join(parts) + "</body>"
+
+
+def render_pdf(sections, output=None):
+    """
+    Render sections to a letter-size PDF with PyMuPDF's Story layout instead of ReportLab.
+
+    Same contract as report_rendering.render_pdf: with no output the PDF bytes are
+    returned, otherwise they are written to output (a path or a binary file object).
+    """
+    archive = pymupdf.Archive()
+    story = pymupdf.Story(html=build_html(sections, archive), user_css=REPORT_CSS, archive=archive)
+    buffer = io.BytesIO()
+    writer = pymupdf.DocumentWriter(buffer, "compress")
+    more = True
+    while more:
+        device = writer.begin_page(PAGE_RECT)
+        more, _ = story.place(CONTENT_RECT)
+        story.draw(device)
+        writer.end_page()
+    writer.close()
+    pdf_bytes = buffer.getvalue()
+    if output is None:
+        return pdf_bytes
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, "wb") as f:
+            f.write(pdf_bytes)
+    else:
+        output.write(pdf_bytes)
+    return output